@@ -243,6 +243,45 @@ def test_collect_module_level():
     temp.cleanup()
 
 
+def test_duplicate_docstrings_are_parsed_once():
+    """
+    pytest testing/test_core.py::test_duplicate_docstrings_are_parsed_once
+    """
+    temp = utils.TempDir()
+    dpath = temp.ensure()
+    modpath = join(dpath, 'test_duplicate_docstrings.py')
+    source = utils.codeblock(
+        """
+        def func1():
+            '''
+            Example:
+                >>> print('same')
+                same
+            '''
+
+
+        def func2():
+            '''
+            Example:
+                >>> print('same')
+                same
+            '''
+        """)
+    with open(modpath, 'w') as file:
+        file.write(source)
+    before = core.parse_memo_info()
+    doctests = list(core.parse_doctestables(modpath, style='google'))
+    after = core.parse_memo_info()
+    assert after['hits'] == before['hits'] + 1
+    func1, func2 = sorted(doctests, key=lambda d: d.callname)
+    assert func1.callname == 'func1' and func2.callname == 'func2'
+    assert func2.lineno > func1.lineno
+    assert func1._parts is func2._parts
+    with utils.PythonPathContext(dpath):
+        assert func2.run(verbose=0, on_error='return')['passed']
+    temp.cleanup()
+
+
 def test_collect_module_level_singleline():
     """
     pytest testing/test_core.py::test_collect_module_level
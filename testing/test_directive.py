@@ -35,6 +35,30 @@ def test_block_skip_directive():
     assert result['passed']
 
 
+def test_block_directive_does_not_leak():
+    """
+    Runtime states are cloned from a shared per-config default, so a block
+    directive in one doctest must not modify the state of the next one.
+
+    pytest testing/test_directive.py::test_block_directive_does_not_leak
+    """
+    string1 = utils.codeblock(
+        '''
+        >>> # doctest: +SKIP
+        >>> assert False, 'should be skipped'
+        ''')
+    string2 = utils.codeblock(
+        '''
+        >>> x = 0
+        ''')
+    self1 = doctest_example.DocTest(docsrc=string1, mode='native')
+    self2 = doctest_example.DocTest(docsrc=string2, mode='native')
+    assert self1.run(on_error='raise')['passed']
+    assert self2.run(on_error='raise')['passed']
+    assert self2.anything_ran()
+    assert not self2._runstate['SKIP']
+
+
 if __name__ == '__main__':
     """
     CommandLine:
@@ -58,6 +58,26 @@ def test_failure():
     assert not result['passed']
 
 
+def test_release_keeps_failed_state():
+    """
+    pytest testing/test_doctest_example.py::test_release_keeps_failed_state
+    """
+    string = utils.codeblock(
+        '''
+        >>> x = 1
+        >>> print(x)
+        >>> assert x == 2
+        ''')
+    self = doctest_example.DocTest(docsrc=string)
+    result = self.run(on_error='return', verbose=0)
+    assert not result['passed']
+    self.release()
+    # Everything needed to report the failure is retained
+    assert self.globs['x'] == 1
+    assert list(self.logged_stdout.values()) == ['1\n']
+    assert len(self.repr_failure()) > 0
+
+
 def test_format_src():
     """
     python testing/test_doctest_example.py test_format_src
@@ -85,6 +105,209 @@ def test_format_src():
     assert utils.strip_ansi(self.format_src(colored=1, linenos=0)) == string
 
 
+def test_no_highlight_when_not_a_tty():
+    """
+    pytest testing/test_doctest_example.py::test_no_highlight_when_not_a_tty
+    """
+    string = utils.codeblock(
+        '''
+        >>> x = 1
+        >>> print(x)
+        1
+        ''')
+    self = doctest_example.DocTest(docsrc=string)
+    self.config['colored'] = True
+    with utils.CaptureStdout() as cap:
+        result = self.run(verbose=3)
+    assert result['passed']
+    assert '>>> x = 1' in cap.text
+    assert '\x1b' not in cap.text
+
+
+def test_timeout_directive():
+    """
+    pytest testing/test_doctest_example.py::test_timeout_directive
+    """
+    import pytest
+    import signal
+    if not hasattr(signal, 'setitimer'):
+        pytest.skip('requires signal.setitimer')
+    string = utils.codeblock(
+        '''
+        >>> # xdoctest: +TIMEOUT(0.1)
+        >>> print('before the loop')
+        >>> while True:
+        ...     pass
+        ''')
+    self = doctest_example.DocTest(docsrc=string)
+    result = self.run(on_error='return', verbose=0)
+    assert not result['passed']
+    assert result['timeout']
+    assert 'before the loop' in result['stdout']
+    assert issubclass(self.exc_info[0], utils.TimeLimitExceeded)
+
+
+def test_timeout_not_swallowed():
+    """
+    pytest testing/test_doctest_example.py::test_timeout_not_swallowed
+    """
+    import pytest
+    import signal
+    if not hasattr(signal, 'setitimer'):
+        pytest.skip('requires signal.setitimer')
+    string = utils.codeblock(
+        '''
+        >>> # xdoctest: +TIMEOUT(0.1)
+        >>> while True:
+        ...     try:
+        ...         pass
+        ...     except Exception:
+        ...         pass
+        ''')
+    self = doctest_example.DocTest(docsrc=string)
+    result = self.run(on_error='return', verbose=0)
+    assert not result['passed']
+    assert result['timeout']
+
+
+def test_max_memory_in_process_is_skipped():
+    """
+    pytest testing/test_doctest_example.py::test_max_memory_in_process_is_skipped
+    """
+    import pytest
+    string = utils.codeblock(
+        '''
+        >>> data = bytearray(10 * 1024 * 1024)
+        ''')
+    self = doctest_example.DocTest(docsrc=string)
+    self.config['max_memory'] = 1
+    with pytest.warns(UserWarning, match='forked'):
+        result = self.run(on_error='raise', verbose=0)
+    assert result['passed']
+
+
+def test_max_memory_forked():
+    """
+    pytest testing/test_doctest_example.py::test_max_memory_forked
+    """
+    import os
+    import pytest
+    if not os.path.exists('/proc/self/statm') or not hasattr(os, 'fork'):
+        pytest.skip('requires os.fork and /proc/self/statm')
+    string = utils.codeblock(
+        '''
+        >>> data = bytearray(200 * 1024 * 1024)
+        ''')
+    self = doctest_example.DocTest(docsrc=string)
+    self.config['max_memory'] = 50
+    with utils.CaptureStdout():
+        result = self.run_forked(verbose=0)
+    assert not result['passed']
+    assert result['memory_limit']
+
+
+def test_run_forked_results():
+    """
+    pytest testing/test_doctest_example.py::test_run_forked_results
+    """
+    import os
+    import pytest
+    if not hasattr(os, 'fork'):
+        pytest.skip('requires os.fork')
+    string = utils.codeblock(
+        '''
+        >>> print('part1')
+        >>> x = 1
+        >>> print('part2')
+        part2
+        ''')
+    self = doctest_example.DocTest(docsrc=string)
+    with utils.CaptureStdout():
+        result = self.run_forked(verbose=0)
+    assert result['passed']
+    # The output of each part is sent back from the child
+    assert list(self.logged_stdout.values()) == ['part1\n', 'part2\n']
+
+    # A child that exits without sending a result is reported as failed
+    string = utils.codeblock(
+        '''
+        >>> import os
+        >>> os._exit(3)
+        ''')
+    self = doctest_example.DocTest(docsrc=string)
+    with utils.CaptureStdout():
+        result = self.run_forked(verbose=0)
+    assert not result['passed']
+    assert 'exited with status' in '\n'.join(self.repr_failure())
+
+
+def test_max_output():
+    """
+    pytest testing/test_doctest_example.py::test_max_output
+    """
+    string = utils.codeblock(
+        '''
+        >>> print('a' * 10)
+        >>> print('b' * 10)
+        >>> print('c' * 10)
+        ''')
+    self = doctest_example.DocTest(docsrc=string)
+    self.config['max_output'] = 15
+    result = self.run(on_error='raise', verbose=0)
+    assert result['passed']
+    assert list(self.logged_stdout.values()) == [
+        'a' * 10 + '\n' + 'b' * 4 + '\n'
+        '... 18 characters of output truncated ...\n'
+    ]
+
+
+def test_stdout_stream_api():
+    """
+    pytest testing/test_doctest_example.py::test_stdout_stream_api
+    """
+    string = utils.codeblock(
+        '''
+        >>> import sys
+        >>> sys.stdout.writelines(['a\\n', 'b\\n'])
+        a
+        b
+        >>> n = sys.stdout.write('c\\n')
+        c
+        >>> assert n == 2
+        >>> assert sys.stdout.writable()
+        ''')
+    self = doctest_example.DocTest(docsrc=string)
+    result = self.run(on_error='raise', verbose=0)
+    assert result['passed']
+
+
+def test_top_level_await():
+    """
+    pytest testing/test_doctest_example.py::test_top_level_await
+    """
+    import sys
+    import pytest
+    if sys.version_info[0:2] < (3, 8):
+        pytest.skip('top-level await requires python 3.8')
+    string = utils.codeblock(
+        '''
+        >>> import asyncio
+        >>> async def double(x):
+        ...     await asyncio.sleep(0)
+        ...     return x * 2
+        >>> await double(21)
+        42
+        >>> for i in range(2):
+        ...     print(await double(i))
+        0
+        2
+        ''')
+    self = doctest_example.DocTest(docsrc=string)
+    assert self.is_async()
+    result = self.run(on_error='raise', verbose=0)
+    assert result['passed']
+
+
 def test_eval_expr_capture():
     """
     pytest testing/test_doctest_example.py::test_eval_expr_capture -s
@@ -194,6 +194,90 @@ def test_defined_by_module():
         assert not flag, '{} should be not defined by {}'.format(item, module)
 
 
+def test_dynamic_calldef_cache():
+    """
+    CommandLine:
+        pytest testing/test_dynamic.py::test_dynamic_calldef_cache
+    """
+    import os
+    from os.path import join
+    from xdoctest import utils
+
+    source = utils.codeblock(
+        '''
+        def func1():
+            """
+            Example:
+                >>> pass
+            """
+        ''')
+    orig_dpath = dynamic.CACHE_DPATH
+    with utils.TempDir() as temp:
+        modpath = join(temp.dpath, 'test_dynamic_cache_mod.py')
+        with open(modpath, 'w') as file:
+            file.write(source)
+        try:
+            dynamic.CACHE_DPATH = join(temp.dpath, 'cache')
+            calldefs1 = dynamic.parse_dynamic_calldefs(modpath)
+            assert len(os.listdir(dynamic.CACHE_DPATH)) == 1
+            # Reused from memory
+            assert dynamic.parse_dynamic_calldefs(modpath) is calldefs1
+
+            # Loaded from disk in a new session
+            dynamic._CALLDEF_CACHE.clear()
+            calldefs2 = dynamic.parse_dynamic_calldefs(modpath)
+            assert calldefs2 is not calldefs1
+            assert calldefs2['func1'].docstr == calldefs1['func1'].docstr
+
+            # Changing the module invalidates the cache
+            with open(modpath, 'a') as file:
+                file.write('\n\ndef func2():\n    """ doc """\n')
+            sys.modules.pop('test_dynamic_cache_mod', None)
+            calldefs3 = dynamic.parse_dynamic_calldefs(modpath)
+            assert 'func2' in calldefs3
+        finally:
+            dynamic.CACHE_DPATH = orig_dpath
+            sys.modules.pop('test_dynamic_cache_mod', None)
+
+
+def test_isolated_calldefs():
+    """
+    CommandLine:
+        pytest testing/test_dynamic.py::test_isolated_calldefs
+    """
+    import pytest
+    from os.path import join
+    from xdoctest import utils
+    if sys.version_info[0] < 3:
+        pytest.skip('isolated imports require python 3')
+
+    sources = {
+        'test_isolated_good': 'def func1():\n    """ docstr1 """\n',
+        'test_isolated_crash': 'import os\nos.abort()\n',
+        'test_isolated_error': 'raise ImportError("missing dependency")\n',
+        'test_isolated_exit': 'import sys\nsys.exit(0)\n',
+    }
+    with utils.TempDir() as temp:
+        modpaths = []
+        for modname, source in sorted(sources.items()):
+            modpath = join(temp.dpath, modname + '.py')
+            with open(modpath, 'w') as file:
+                file.write(source)
+            modpaths.append(modpath)
+        results = list(dynamic.iter_isolated_calldefs(modpaths, jobs=3))
+
+    assert [result[0] for result in results] == modpaths
+    crash, error, exited, good = results
+    (_, crash_defs, crash_ex), (_, error_defs, error_ex) = crash, error
+    (_, exit_defs, exit_ex), (_, good_defs, good_ex) = exited, good
+    assert crash_defs is None and 'crashed' in str(crash_ex)
+    assert error_defs is None and 'missing dependency' in str(error_ex)
+    assert exit_defs is None and 'produced no result' in str(exit_ex)
+    assert good_ex is None
+    assert good_defs['func1'].docstr == ' docstr1 '
+    assert 'test_isolated_good' not in sys.modules
+
+
 if __name__ == '__main__':
     """
     CommandLine:
@@ -69,3 +69,45 @@ def test_xdoc_console_script_exec():
         info = cmd('xdoctest')
     print('info = {!r}'.format(info))
     assert 'usage' in info['err']
+
+
+def test_import_is_lazy():
+    """
+    Importing xdoctest (which pytest does to load the plugin) should not
+    import the runner or any of the parsing machinery.
+
+    pytest testing/test_entry_point.py::test_import_is_lazy
+    """
+    if sys.version_info[0:2] < (3, 7):
+        pytest.skip('module-level __getattr__ requires Python 3.7')
+    if sys.platform.startswith('win32'):
+        pytest.skip()
+    import xdoctest
+    repodir = os.path.dirname(os.path.dirname(xdoctest.__file__))
+    code = ('import sys, xdoctest; '
+            'print(sorted(m for m in sys.modules if m.startswith("xdoctest")))')
+    info = cmd('cd "{}" && "{}" -c \'{}\''.format(repodir, sys.executable, code))
+    assert info['ret'] == 0, info['err']
+    assert info['out'].strip() == "['xdoctest']"
+
+
+def test_docs_rejects_other_styles():
+    """
+    pytest testing/test_entry_point.py::test_docs_rejects_other_styles
+    """
+    if sys.platform.startswith('win32'):
+        pytest.skip()
+    import xdoctest
+    from xdoctest import utils
+    repodir = os.path.dirname(os.path.dirname(xdoctest.__file__))
+    with utils.TempDir() as temp:
+        with open(os.path.join(temp.dpath, 'index.rst'), 'w') as file:
+            file.write('>>> print(1)\n1\n')
+        base = 'cd "{}" && "{}" -m xdoctest --docs "{}" all'.format(
+            repodir, sys.executable, temp.dpath)
+        info = cmd(base)
+        assert info['ret'] == 0, info['err']
+        assert '1 passed' in info['out']
+        info = cmd(base + ' --style google')
+        assert info['ret'] != 0
+        assert '--docs only supports --style freeform' in info['err']
@@ -658,6 +658,43 @@ def test_block_directive_want2_eval2():
     assert len(parts) == 4
 
 
+def test_batched_ps1_linenos():
+    """
+    pytest testing/test_parser.py::test_batched_ps1_linenos
+    """
+    source_chunks = [
+        ['>>> x = 1', '>>> x'],
+        ['>>> @staticmethod', '... def foo():', '...     return 0'],
+        ['>>> y = """', '... multi', '... line"""', '>>> # comment', '>>> y'],
+        ['>>> a = 1; b = 2', '>>> if a:', '...     b'],
+    ]
+    self = parser.DoctestParser()
+    batched = self._locate_all_ps1_linenos(source_chunks)
+    expected = [self._locate_ps1_linenos(lines) for lines in source_chunks]
+    assert batched == expected
+
+
+def test_batched_parse_syntax_error():
+    """
+    pytest testing/test_parser.py::test_batched_parse_syntax_error
+    """
+    string = utils.codeblock(
+        '''
+        >>> x = 1
+        >>> x
+        1
+        >>> y = 1 +* 2
+        >>> y
+        3
+        ''')
+    self = parser.DoctestParser()
+    with pytest.raises(exceptions.DoctestParseError) as exc_info:
+        self.parse(string)
+    # The error is reported relative to the chunk that contains it
+    assert exc_info.value.orig_ex.text.strip() == 'y = 1 +* 2'
+    assert exc_info.value.orig_ex.lineno == 1
+
+
 if __name__ == '__main__':
     """
     CommandLine:
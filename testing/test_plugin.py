@@ -117,6 +117,30 @@ class TestXDoctest(object):
                                                     '--xdoctest-modules')
             assert len(items) == 0
 
+    def test_collect_module_xdist_group(self, testdir):
+        """
+        CommandLine:
+            pytest testing/test_plugin.py::TestXDoctest::test_collect_module_xdist_group
+        """
+        path = testdir.makepyfile(whatever="""
+            def foo():
+                '''
+                >>> 1
+                1
+                '''
+
+            def bar():
+                '''
+                >>> 2
+                2
+                '''
+        """)
+        items, reprec = testdir.inline_genitems(path, '--xdoctest-modules')
+        assert len(items) == 2
+        for item in items:
+            mark = item.get_closest_marker('xdist_group')
+            assert mark.kwargs['name'] == str(path)
+
     def test_simple_doctestfile(self, testdir):
         """
         CommandLine:
@@ -182,6 +206,51 @@ class TestXDoctest(object):
             '*1 passed*',
         ])
 
+    @pytest.mark.parametrize('globs', [
+        ['test*.txt'],
+        ['xdoc*.txt', '*.foo'],
+        ['docs/*.rst'],
+        ['test*.txt', 'docs/sub/*.md'],
+    ])
+    def test_compile_glob_matcher_matches_fnmatch(self, globs):
+        """
+        The precompiled matcher agrees with matching each glob separately
+
+        CommandLine:
+            pytest testing/test_plugin.py::TestXDoctest::test_compile_glob_matcher_matches_fnmatch
+        """
+        import os
+        import fnmatch
+        from os.path import basename, isabs, join, normcase
+        from xdoctest.plugin import _compile_glob_matcher
+
+        def reference(path, glob):
+            # The semantics of py.path.local.check(fnmatch=glob)
+            glob = glob.replace('/', os.sep)
+            if os.sep not in glob:
+                return fnmatch.fnmatch(basename(path), glob)
+            if not isabs(glob):
+                glob = '*' + os.sep + glob
+            return fnmatch.fnmatch(path, glob)
+
+        root = normcase(os.path.abspath('root'))
+        paths = [
+            join(root, 'test_me.txt'),
+            join(root, 'me_test.txt'),
+            join(root, 'xdoc_a.txt'),
+            join(root, 'test.foo'),
+            join(root, 'docs', 'index.rst'),
+            join(root, 'other', 'index.rst'),
+            join(root, 'docs', 'sub', 'readme.md'),
+            join(root, 'sub', 'readme.md'),
+            join(root, 'test_dir', 'me.txt'),
+        ]
+        globmatch = _compile_glob_matcher(
+            [glob.replace('/', os.sep) for glob in globs])
+        for path in paths:
+            expected = any(reference(path, glob) for glob in globs)
+            assert globmatch(path) == expected, (path, globs)
+
     @pytest.mark.parametrize(
         '   test_string,    encoding',
         [
@@ -1299,6 +1368,91 @@ class TestXDoctestNamespaceFixture(object):
         reprec.assertoutcome(passed=1)
 
 
+    def test_getfixture_without_autouse(self, testdir):
+        """
+        The fixture request is built lazily when getfixture is first used
+
+        pytest testing/test_plugin.py::TestXDoctestNamespaceFixture::test_getfixture_without_autouse
+        """
+        p = testdir.makepyfile("""
+            def foo():
+                '''
+                >>> dir = getfixture('tmpdir')
+                >>> type(dir).__name__
+                'LocalPath'
+                '''
+
+            def bar():
+                '''
+                >>> print('no fixtures')
+                no fixtures
+                '''
+        """)
+        reprec = testdir.inline_run(p, "--xdoctest-modules", *EXTRA_ARGS)
+        reprec.assertoutcome(passed=2)
+
+    def test_namespace_function_override_per_item(self, testdir):
+        """
+        pytest testing/test_plugin.py::TestXDoctestNamespaceFixture::test_namespace_function_override_per_item
+        """
+        testdir.makeconftest("""
+            import pytest
+            CALLS = []
+
+            @pytest.fixture
+            def xdoctest_namespace():
+                CALLS.append(1)
+                return {'n_calls': len(CALLS)}
+        """)
+        p = testdir.makepyfile("""
+            def foo():
+                '''
+                >>> print(n_calls)
+                1
+                '''
+
+            def bar():
+                '''
+                >>> print(n_calls)
+                2
+                '''
+        """)
+        reprec = testdir.inline_run(p, "--xdoctest-modules", *EXTRA_ARGS)
+        reprec.assertoutcome(passed=2)
+
+    def test_namespace_module_override_not_reused(self, testdir):
+        """
+        A module scoped namespace is not reused after pytest tears it down
+
+        pytest testing/test_plugin.py::TestXDoctestNamespaceFixture::test_namespace_module_override_not_reused
+        """
+        testdir.makeconftest("""
+            import pytest
+            CALLS = []
+
+            @pytest.fixture(scope='module')
+            def xdoctest_namespace():
+                CALLS.append(1)
+                return {'n_calls': len(CALLS)}
+        """)
+        for idx in [1, 2]:
+            testdir.makepyfile(**{'mod{}'.format(idx): """
+                def foo():
+                    '''
+                    >>> print(n_calls)
+                    {idx}
+                    '''
+
+                def bar():
+                    '''
+                    >>> print(n_calls)
+                    {idx}
+                    '''
+            """.format(idx=idx)})
+        reprec = testdir.inline_run("--xdoctest-modules", *EXTRA_ARGS)
+        reprec.assertoutcome(passed=4)
+
+
 class TestXDoctestReportingOption(object):
 
     def _run_doctest_report(self, testdir, format):
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import contextlib
 from os.path import join
 from xdoctest import utils
 
@@ -7,6 +8,7 @@ def test_zero_args():
     """
     python testing/test_runner.py test_zero_args
     """
+    from xdoctest import core
     from xdoctest import runner
 
     source = utils.codeblock(
@@ -55,12 +57,14 @@ def test_zero_args():
         with open(modpath, 'w') as file:
             file.write(source)
 
-        zero_func_names = {
-            example.callname
-            for example in runner._gather_zero_arg_examples(modpath)
-        }
-        assert zero_func_names == set(['zero_args1', 'zero_args2',
-                                       'zero_args3', 'zero_args4'])
+        zero_arg_index = {}
+        list(core.parse_doctestables(modpath, zero_arg_index=zero_arg_index))
+        assert set(zero_arg_index) == set(['zero_args1', 'zero_args2',
+                                           'zero_args3', 'zero_args4'])
+        example, = runner._lookup_zero_arg_examples(zero_arg_index,
+                                                    'zero_args1:0')
+        assert example.callname == 'zero_args1'
+        assert example.block_type == 'zero-arg'
 
 
 def test_list():
@@ -286,6 +290,196 @@ def test_run_zero_arg():
         assert 'running zero arg' in cap.text
 
 
+@contextlib.contextmanager
+def _count_parse_calldefs():
+    """
+    Records the path of every module that is statically parsed
+    """
+    from xdoctest import static_analysis as static
+    parsed = []
+    orig_parse_calldefs = static.parse_calldefs
+
+    def _counting_parse_calldefs(*args, **kwargs):
+        parsed.append(kwargs.get('fpath'))
+        return orig_parse_calldefs(*args, **kwargs)
+
+    static.parse_calldefs = _counting_parse_calldefs
+    try:
+        yield parsed
+    finally:
+        static.parse_calldefs = orig_parse_calldefs
+
+
+def test_zero_arg_parsed_once():
+    """
+    pytest testing/test_runner.py::test_zero_arg_parsed_once -s
+    """
+    from xdoctest import runner
+
+    source = utils.codeblock(
+        '''
+        def zero_arg_print():
+            print('running zero arg')
+        ''')
+
+    with utils.TempDir() as temp:
+        modpath = join(temp.dpath, 'test_zero_arg_parsed_once.py')
+        with open(modpath, 'w') as file:
+            file.write(source)
+
+        with _count_parse_calldefs() as parsed:
+            with utils.CaptureStdout() as cap:
+                runner.doctest_module(modpath, 'zero_arg_print:0', argv=[''])
+
+    assert 'running zero arg' in cap.text
+    assert parsed == [modpath]
+
+
+def test_single_test_name_index():
+    """
+    pytest testing/test_runner.py::test_single_test_name_index -s
+    """
+    import os
+    from xdoctest import core
+    from xdoctest import runner
+
+    source_fmt = utils.codeblock(
+        '''
+        def {name}():
+            """
+            Example:
+                >>> print('running {name}')
+            """
+        ''')
+
+    with utils.TempDir() as temp:
+        pkgpath = join(temp.dpath, 'test_name_index_pkg')
+        os.makedirs(pkgpath)
+        open(join(pkgpath, '__init__.py'), 'w').close()
+        for name in ['func1', 'func2', 'func3']:
+            with open(join(pkgpath, name + '_mod.py'), 'w') as file:
+                file.write(source_fmt.format(name=name))
+
+        with _count_parse_calldefs() as parsed:
+            # Runs that do not target a name neither build nor use the index
+            with utils.CaptureStdout() as cap:
+                runner.doctest_module(pkgpath, 'list', argv=[''])
+            assert len(parsed) == 4
+            assert not any(key[0] == os.path.realpath(pkgpath)
+                           for key in core._NAME_INDEXES)
+            del parsed[:]
+
+            # The first targeted run builds the index
+            with utils.CaptureStdout() as cap:
+                runner.doctest_module(pkgpath, 'func1:0', argv=[''])
+            assert len(parsed) == 4
+            del parsed[:]
+
+            with utils.CaptureStdout() as cap:
+                summary = runner.doctest_module(pkgpath, 'func2:0',
+                                                argv=[''])
+
+    assert summary['n_total'] == 1
+    assert 'running func2' in cap.text
+    assert parsed == [join(pkgpath, 'func2_mod.py')]
+
+
+def test_dump_to_dir():
+    """
+    pytest testing/test_runner.py::test_dump_to_dir -s
+    """
+    import os
+    import sys
+    import json
+    from xdoctest import runner
+
+    source = utils.codeblock(
+        '''
+        def _private():
+            return 1
+
+
+        class TestHelper(object):
+            pass
+
+
+        def func1():
+            """
+            Example:
+                >>> from os.path import *
+                >>> assert _private() == 1
+                >>> print(join('a', 'b'))
+                a/b
+            """
+        ''')
+
+    with utils.TempDir() as temp:
+        modpath = join(temp.dpath, 'test_dump_mod.py')
+        out_dpath = join(temp.dpath, 'out')
+        with open(modpath, 'w') as file:
+            file.write(source)
+        config = {'dump_dpath': out_dpath}
+
+        with utils.CaptureStdout() as cap:
+            runner.doctest_module(modpath, 'dump', argv=[''], config=config)
+        assert 'wrote 1 of 1 test modules' in cap.text
+        test_fpath = join(out_dpath, 'test_test_dump_mod.py')
+        with open(join(out_dpath, 'xdoctest_dump.json')) as file:
+            manifest = json.load(file)
+        entry = manifest['modules'][modpath]
+        assert entry['fname'] == 'test_test_dump_mod.py'
+        # Each part maps to the lines of its doctest source
+        part1, part2 = entry['tests']['test_func1']['lines']
+        gen_line, source_line, n_lines = part1
+        assert (source_line, n_lines) == (12, 2)
+        assert part2[1:] == [14, 1]
+        with open(test_fpath) as file:
+            gen_lines = file.read().split('\n')
+        assert gen_lines[gen_line - 2] == 'def test_func1():'
+        assert gen_lines[gen_line - 1].strip() == "_import_star('os.path')"
+
+        # The generated test runs on its own
+        namespace = {}
+        with utils.PythonPathContext(temp.dpath):
+            exec(compile(open(test_fpath).read(), test_fpath, 'exec'),
+                 namespace)
+            namespace['test_func1']()
+        sys.modules.pop('test_dump_mod', None)
+        # Names that pytest would collect are not imported from the module
+        assert '_private' in namespace
+        assert 'TestHelper' not in namespace
+
+        # Another module dumped to the same directory
+        other_dpath = join(temp.dpath, 'other')
+        os.makedirs(other_dpath)
+        other_modpath = join(other_dpath, 'test_dump_mod.py')
+        with open(other_modpath, 'w') as file:
+            file.write(source)
+        with utils.CaptureStdout() as cap:
+            runner.doctest_module(other_modpath, 'dump', argv=[''],
+                                  config=config)
+        with open(join(out_dpath, 'xdoctest_dump.json')) as file:
+            manifest = json.load(file)
+        # Its test module name does not collide with the first one
+        other_fname = manifest['modules'][other_modpath]['fname']
+        assert other_fname == 'test_test_dump_mod_2.py'
+        assert manifest['modules'][modpath]['fname'] == 'test_test_dump_mod.py'
+
+        # Unchanged modules are not written again
+        with utils.CaptureStdout() as cap:
+            runner.doctest_module(modpath, 'dump', argv=[''], config=config)
+        assert 'wrote 0 of 1 test modules' in cap.text
+
+        # Modules without doctests lose their tests
+        with open(modpath, 'w') as file:
+            file.write('def func1():\n    pass\n')
+        with utils.CaptureStdout() as cap:
+            runner.doctest_module(modpath, 'dump', argv=[''], config=config)
+        assert not os.path.exists(test_fpath)
+        # The tests of other modules are kept
+        assert os.path.exists(join(out_dpath, other_fname))
+
+
 def test_parse_cmdline():
     """
     pytest testing/test_runner.py::test_parse_cmdline -s
@@ -331,6 +525,422 @@ def test_runner_config():
     assert 'SKIPPED' in cap.text
 
 
+def test_runner_shared_namespace():
+    """
+    pytest testing/test_runner.py::test_runner_shared_namespace -s
+    """
+    from xdoctest import runner
+
+    source = utils.codeblock(
+        '''
+        CALLS = []
+
+
+        def setup():
+            """
+                Example:
+                    >>> model = CALLS.append('load') or len(CALLS)
+                    >>> leaked = 'setup'
+            """
+
+
+        def use1():
+            """
+                Example:
+                    >>> assert model == 1
+                    >>> leaked = 'use1'
+            """
+
+
+        def use2():
+            """
+                Example:
+                    >>> assert model == 1 and leaked == 'setup'
+                    >>> assert CALLS == ['load']
+            """
+        ''')
+
+    config = {
+        'default_runtime_state': {'SHARED_NAMESPACE': True},
+    }
+
+    with utils.TempDir() as temp:
+        dpath = temp.dpath
+        modpath = join(dpath, 'test_shared_namespace.py')
+
+        with open(modpath, 'w') as file:
+            file.write(source)
+
+        with utils.CaptureStdout() as cap:
+            run_summary = runner.doctest_module(modpath, 'all', argv=[''],
+                                                config=config)
+
+    assert run_summary['n_passed'] == 3, cap.text
+
+
+def test_runner_shared_namespace_per_module():
+    """
+    pytest testing/test_runner.py::test_runner_shared_namespace_per_module -s
+    """
+    import os
+    from xdoctest import runner
+
+    source_fmt = utils.codeblock(
+        '''
+        NAME = {name!r}
+
+
+        def func():
+            """
+                Example:
+                    >>> # xdoctest: +SHARED_NAMESPACE
+                    >>> assert NAME == {name!r}, NAME
+            """
+        ''')
+
+    with utils.TempDir() as temp:
+        pkgpath = join(temp.dpath, 'test_shared_pkg')
+        os.makedirs(pkgpath)
+        open(join(pkgpath, '__init__.py'), 'w').close()
+        for name in ['a', 'b']:
+            with open(join(pkgpath, name + '.py'), 'w') as file:
+                file.write(source_fmt.format(name=name))
+
+        with utils.CaptureStdout() as cap:
+            run_summary = runner.doctest_module(pkgpath, 'all', argv=[''])
+
+    assert run_summary['n_passed'] == 2, cap.text
+
+
+def test_runner_shared_namespace_skipped_setup():
+    """
+    pytest testing/test_runner.py::test_runner_shared_namespace_skipped_setup -s
+    """
+    from xdoctest import runner
+
+    source = utils.codeblock(
+        '''
+        def a():
+            """
+                Example:
+                    >>> # xdoctest: +SHARED_NAMESPACE
+                    >>> # xdoctest: +SKIP
+                    >>> unused = 1
+            """
+
+
+        def b():
+            """
+                Example:
+                    >>> # xdoctest: +SHARED_NAMESPACE
+                    >>> model = 'loaded'
+            """
+
+
+        def c():
+            """
+                Example:
+                    >>> # xdoctest: +SHARED_NAMESPACE
+                    >>> print(model)
+                    loaded
+            """
+        ''')
+
+    with utils.TempDir() as temp:
+        modpath = join(temp.dpath, 'test_shared_skipped_setup.py')
+        with open(modpath, 'w') as file:
+            file.write(source)
+
+        with utils.CaptureStdout() as cap:
+            run_summary = runner.doctest_module(modpath, 'all', argv=[''])
+
+    # The skipped example does not become the setup of the others
+    assert run_summary['n_failed'] == 0, cap.text
+    assert 'loaded' in cap.text
+
+
+def test_runner_fork():
+    """
+    pytest testing/test_runner.py::test_runner_fork -s
+    """
+    import os
+    import pytest
+    from xdoctest import runner
+    if not hasattr(os, 'fork'):
+        pytest.skip('requires os.fork')
+
+    source = utils.codeblock(
+        '''
+        STATE = []
+
+
+        def leak():
+            """
+                Example:
+                    >>> STATE.append(1)
+                    >>> print('from the child')
+            """
+
+
+        def check():
+            """
+                Example:
+                    >>> assert STATE == []
+                    >>> print(len(STATE))
+                    1
+            """
+        ''')
+
+    with utils.TempDir() as temp:
+        dpath = temp.dpath
+        modpath = join(dpath, 'test_runner_fork.py')
+
+        with open(modpath, 'w') as file:
+            file.write(source)
+
+        with utils.CaptureStdout() as cap:
+            run_summary = runner.doctest_module(modpath, 'all', argv=[''],
+                                                config={'fork': True})
+
+    assert run_summary['n_passed'] == 1
+    assert run_summary['n_failed'] == 1
+    assert 'from the child' in cap.text
+    failed, = run_summary['failed']
+    assert failed.callname == 'check'
+    assert 'Got:' in '\n'.join(failed.repr_failure())
+
+
+def test_runner_fork_shared_namespace():
+    """
+    pytest testing/test_runner.py::test_runner_fork_shared_namespace -s
+    """
+    import os
+    import pytest
+    from xdoctest import runner
+    if not hasattr(os, 'fork'):
+        pytest.skip('requires os.fork')
+
+    source = utils.codeblock(
+        '''
+        def setup():
+            """
+                Example:
+                    >>> # xdoctest: +SHARED_NAMESPACE
+                    >>> import os
+                    >>> parent_pid = os.getpid()
+            """
+
+
+        def use():
+            """
+                Example:
+                    >>> # xdoctest: +SHARED_NAMESPACE
+                    >>> assert parent_pid == os.getpid()
+            """
+
+
+        def isolated():
+            """
+                Example:
+                    >>> import os
+                    >>> print('child=%d' % os.getpid())
+            """
+        ''')
+
+    with utils.TempDir() as temp:
+        modpath = join(temp.dpath, 'test_runner_fork_shared.py')
+        with open(modpath, 'w') as file:
+            file.write(source)
+
+        with utils.CaptureStdout() as cap:
+            run_summary = runner.doctest_module(modpath, 'all', argv=[''],
+                                                config={'fork': True})
+
+    # Examples sharing a namespace ran in this process, the other was forked
+    assert run_summary['n_passed'] == 3, cap.text
+    assert 'child=' in cap.text
+    assert 'child=%d\n' % os.getpid() not in cap.text
+
+
+def test_runner_async_jobs():
+    """
+    pytest testing/test_runner.py::test_runner_async_jobs -s
+    """
+    import sys
+    import pytest
+    from xdoctest import runner
+    if sys.version_info[0:2] < (3, 8):
+        pytest.skip('top-level await requires python 3.8')
+
+    # Each example waits until all of them have started, which only
+    # finishes when their awaits overlap.
+    funcs = ['STATE = {"started": 0}']
+    for idx in range(4):
+        funcs.append(utils.codeblock(
+            '''
+            def func{idx}():
+                """
+                    Example:
+                        >>> import asyncio
+                        >>> STATE['started'] += 1
+                        >>> async def all_started():
+                        ...     while STATE['started'] < 4:
+                        ...         await asyncio.sleep(0.01)
+                        >>> await asyncio.wait_for(all_started(), 5)
+                        >>> print('result{idx}')
+                        result{idx}
+                """
+            ''').format(idx=idx))
+    source = '\n\n\n'.join(funcs)
+
+    with utils.TempDir() as temp:
+        dpath = temp.dpath
+        modpath = join(dpath, 'test_runner_async_jobs.py')
+
+        with open(modpath, 'w') as file:
+            file.write(source)
+
+        with utils.CaptureStdout() as cap:
+            run_summary = runner.doctest_module(
+                modpath, 'all', argv=[''], verbose=1,
+                config={'async_jobs': 4})
+
+    assert run_summary['n_passed'] == 4, cap.text
+    positions = [cap.text.index('func{}'.format(idx)) for idx in range(4)]
+    assert positions == sorted(positions)
+
+
+def test_runner_thread_jobs():
+    """
+    pytest testing/test_runner.py::test_runner_thread_jobs -s
+    """
+    from xdoctest import runner
+
+    # The barrier is only passed when all examples run at the same time
+    funcs = ['import threading\nBARRIER = threading.Barrier(4, timeout=5)']
+    for idx in range(4):
+        funcs.append(utils.codeblock(
+            '''
+            def func{idx}():
+                """
+                    Example:
+                        >>> for _ in range(3):
+                        ...     print('out{idx}')
+                        ...     _ = BARRIER.wait()
+                        out{idx}
+                        out{idx}
+                        out{idx}
+                """
+            ''').format(idx=idx))
+    source = '\n\n\n'.join(funcs)
+
+    with utils.TempDir() as temp:
+        dpath = temp.dpath
+        modpath = join(dpath, 'test_runner_thread_jobs.py')
+
+        with open(modpath, 'w') as file:
+            file.write(source)
+
+        with utils.CaptureStdout() as cap:
+            run_summary = runner.doctest_module(
+                modpath, 'all', argv=[''], config={'jobs': 4, 'threads': True})
+
+    assert run_summary['n_passed'] == 4, cap.text
+
+
+def test_runner_thread_jobs_max_memory():
+    """
+    pytest testing/test_runner.py::test_runner_thread_jobs_max_memory -s
+    """
+    import os
+    import pytest
+    from xdoctest import runner
+    if not hasattr(os, 'fork'):
+        pytest.skip('requires os.fork')
+
+    source = utils.codeblock(
+        '''
+        def func1():
+            """
+                Example:
+                    >>> import os
+                    >>> print('pid=%d' % os.getpid())
+            """
+        ''')
+
+    with utils.TempDir() as temp:
+        modpath = join(temp.dpath, 'test_runner_thread_max_memory.py')
+        with open(modpath, 'w') as file:
+            file.write(source)
+
+        with utils.CaptureStdout() as cap:
+            with pytest.warns(UserWarning, match='forked instead'):
+                run_summary = runner.doctest_module(
+                    modpath, 'all', argv=[''], verbose=1,
+                    config={'jobs': 2, 'threads': True, 'max_memory': 1000})
+
+    assert run_summary['n_passed'] == 1, cap.text
+    # The example ran in a forked child instead of a thread
+    assert 'pid=' in cap.text
+    assert 'pid=%d\n' % os.getpid() not in cap.text
+
+
+def test_runner_docs():
+    """
+    pytest testing/test_runner.py::test_runner_docs -s
+    """
+    import os
+    from xdoctest import runner
+
+    rst_text = utils.codeblock(
+        '''
+        Usage
+        =====
+
+        Prose before the example::
+
+            >>> x = 3
+
+        .. code-block:: python
+
+            def not_a_doctest():
+                pass
+
+        >>> print(x + 1)
+        4
+        ''')
+    md_text = utils.codeblock(
+        '''
+        # Failing
+
+        ```python
+        >>> assert 1 == 2
+        ```
+        ''')
+
+    with utils.TempDir() as temp:
+        dpath = temp.dpath
+        os.makedirs(join(dpath, 'guide'))
+        os.makedirs(join(dpath, '.hidden'))
+        with open(join(dpath, 'usage.rst'), 'w') as file:
+            file.write(rst_text)
+        with open(join(dpath, 'guide', 'failing.md'), 'w') as file:
+            file.write(md_text)
+        with open(join(dpath, '.hidden', 'skipped.md'), 'w') as file:
+            file.write(md_text)
+        with open(join(dpath, 'notes.txt'), 'w') as file:
+            file.write('no prompts here\n')
+
+        with utils.CaptureStdout() as cap:
+            run_summary = runner.doctest_docs(dpath, 'all', argv=[''])
+
+    assert run_summary['n_total'] == 2, cap.text
+    assert run_summary['n_passed'] == 1, cap.text
+    failed, = run_summary['failed']
+    assert failed.callname == 'guide/failing.md'
+    assert failed.failed_lineno() == 4
+
+
 if __name__ == '__main__':
     """
     CommandLine:
@@ -70,6 +70,36 @@ def test_lineno():
         assert docsrc_lines[-1].strip().endswith('"""')
 
 
+def test_nested_blocks():
+    """
+    pytest testing/test_static.py::test_nested_blocks
+    """
+    source = utils.codeblock(
+        '''
+        x = 1
+        try:
+            import numpy
+        except ImportError:
+            def fallback():
+                """ fallback doc """
+        else:
+            y = 2
+        if True:
+            class Spam(object):
+                def eggs(self):
+                    pass
+        value = [lambda: 0 for _ in range(3)]
+        if __name__ == '__main__':
+            def main():
+                pass
+        ''')
+    self = static.TopLevelVisitor.parse(source)
+    assert list(self.calldefs.keys()) == ['fallback', 'Spam', 'Spam.eggs']
+    assert self.assignments == ['x', 'y', 'value']
+    assert self.calldefs['fallback'].doclineno == 6
+    assert self.calldefs['Spam.eggs'].lineno_end == 13
+
+
 def test_mod_lineno2():
     source = utils.codeblock(
         '''
@@ -1,7 +1,13 @@
 # -*- coding: utf-8 -*-
 """
 mkinit xdoctest --nomods
+
+The public attributes of this package are imported lazily on first access, so
+`import xdoctest` (which pytest does at startup to load the plugin) does not
+pull in the runner, parser, or analysis modules.
 """
+import sys
+
 __version__ = '0.5.9'  # nocover
 
 # Expose only select submodules
@@ -10,13 +16,48 @@ __submodules__ = [
     'exceptions',
 ]
 
+# Maps each public attribute to the module (and name) it is imported from
+_LAZY_ATTRS = {
+    'utils': ('xdoctest.utils', None),
+    'docstr': ('xdoctest.docstr', None),
+    'doctest_module': ('xdoctest.runner', 'doctest_module'),
+    'doctest_docs': ('xdoctest.runner', 'doctest_docs'),
+    'DoctestParseError': ('xdoctest.exceptions', 'DoctestParseError'),
+    'ExitTestException': ('xdoctest.exceptions', 'ExitTestException'),
+    'MalformedDocstr': ('xdoctest.exceptions', 'MalformedDocstr'),
+}
+
+
+def __getattr__(name):
+    """
+    Example:
+        >>> import xdoctest
+        >>> assert xdoctest.doctest_module.__module__ == 'xdoctest.runner'
+    """
+    try:
+        modname, attr = _LAZY_ATTRS[name]
+    except KeyError:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(
+            __name__, name))
+    import importlib
+    module = importlib.import_module(modname)
+    value = module if attr is None else getattr(module, attr)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
+
 
-from xdoctest import utils
-from xdoctest import docstr
-from xdoctest.runner import (doctest_module,)
-from xdoctest.exceptions import (DoctestParseError, ExitTestException,
-                                 MalformedDocstr,)
+if sys.version_info[0:2] < (3, 7):  # nocover
+    # Module-level __getattr__ is not supported, so import everything eagerly
+    from xdoctest import utils
+    from xdoctest import docstr
+    from xdoctest.runner import (doctest_module, doctest_docs,)
+    from xdoctest.exceptions import (DoctestParseError, ExitTestException,
+                                     MalformedDocstr,)
 
 
 __all__ = ['DoctestParseError', 'ExitTestException', 'MalformedDocstr',
-           'doctest_module', 'utils', 'docstr', '__version__']
+           'doctest_module', 'doctest_docs', 'utils', 'docstr', '__version__']
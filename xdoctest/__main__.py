@@ -21,16 +21,51 @@ def main():
         ''')
 
     parser = argparse.ArgumentParser(prog='python -m xdoctest', description=description)
-    parser.add_argument('modname', help='what files to run')
-    parser.add_argument('command', help='a doctest name or a command (list|all)', default='list')
-    parser.add_argument(*('--style',), type=str, help='choose your style',
-                        choices=['auto', 'google', 'freeform'], default='auto')
+    parser.add_argument('modname', nargs='?', help='what files to run')
+    parser.add_argument('command', nargs='?', help='a doctest name or a command (list|all)', default='list')
+    parser.add_argument(*('--docs',), dest='docs', default=None, metavar='DIR',
+                        help=('Run the doctests in the rst / md / txt files '
+                              'under DIR instead of a module. The only '
+                              'positional argument is then the command. '
+                              'Documentation files only have freeform '
+                              'doctests, so no other --style is allowed.'))
+    parser.add_argument(*('--style',), type=str,
+                        help=('choose your style (default: auto, or freeform '
+                              'with --docs)'),
+                        choices=['auto', 'google', 'freeform'], default=None)
     parser.add_argument(*('--options',), type=str,
                         help='specify the default directive state',
                         default=None)
     parser.add_argument(*('--offset',), dest='offset_linenos', action='store_true',
                         help=('Doctest outputs will display line numbers '
                               'wrt to the source file.'))
+    parser.add_argument(*('--timeout',), type=float, default=None,
+                        help='Fail doctests that run longer than this many seconds.')
+    parser.add_argument(*('--max-memory',), dest='max_memory', type=float,
+                        default=None,
+                        help=('Fail doctests that allocate more than this many megabytes. '
+                              'Only enforced with --fork.'))
+    parser.add_argument(*('--max-output',), dest='max_output', type=int,
+                        default=None,
+                        help=('Capture at most this many characters of '
+                              'stdout per doctest.'))
+    parser.add_argument(*('--async-jobs',), dest='async_jobs', type=int,
+                        default=0,
+                        help=('Run up to this many doctests that use '
+                              'top-level await concurrently.'))
+    parser.add_argument(*('--jobs',), dest='jobs', type=int, default=0,
+                        help='Run doctests in parallel (requires --threads).')
+    parser.add_argument(*('--threads',), dest='threads', action='store_true',
+                        help='Use a thread pool to run --jobs doctests at once.')
+    parser.add_argument(*('--out',), dest='dump_dpath', default=None,
+                        metavar='DIR',
+                        help=('With the dump command, write one test module '
+                              'per source module to DIR instead of stdout.'))
+    parser.add_argument(*('--profile',), dest='profile', action='store_true',
+                        help='Report how often parsed docstrings were reused.')
+    parser.add_argument(*('--fork',), dest='fork', action='store_true',
+                        help=('Run each doctest in a child process forked '
+                              'after importing the module (posix only).'))
 
     args, unknown = parser.parse_known_args()
     ns = args.__dict__.copy()
@@ -38,7 +73,20 @@ def main():
     # ... postprocess args
     modname = ns['modname']
     command = ns['command']
+    if ns['docs'] is not None:
+        if command != 'list' and modname is not None:
+            parser.error('--docs takes a single command argument')
+        if modname is not None:
+            command = modname
+    elif modname is None:
+        parser.error('the following arguments are required: modname')
     style = ns['style']
+    if ns['docs'] is not None:
+        if style not in {None, 'freeform'}:
+            parser.error('--docs only supports --style freeform')
+        style = 'freeform'
+    elif style is None:
+        style = 'auto'
     offset_linenos = ns['offset_linenos']
 
     if ns['options'] is None:
@@ -65,11 +113,24 @@ def main():
     config = {
         'default_runtime_state': default_runtime_state,
         'offset_linenos': offset_linenos,
+        'fork': ns['fork'],
+        'async_jobs': ns['async_jobs'],
+        'jobs': ns['jobs'],
+        'threads': ns['threads'],
+        'timeout': ns['timeout'],
+        'max_memory': ns['max_memory'],
+        'max_output': ns['max_output'],
+        'profile': ns['profile'],
+        'dump_dpath': ns['dump_dpath'],
     }
 
     import xdoctest
-    xdoctest.doctest_module(modname, argv=[command], style=style,
-                            config=config)
+    if ns['docs'] is not None:
+        xdoctest.doctest_docs(ns['docs'], argv=[command], style=style,
+                              config=config)
+    else:
+        xdoctest.doctest_module(modname, argv=[command], style=style,
+                                config=config)
 
 
 if __name__ == '__main__':
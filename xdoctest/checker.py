@@ -4,7 +4,6 @@ Checks for got-vs-want statments
 """
 from __future__ import print_function, division, absolute_import, unicode_literals
 import re
-import difflib
 from xdoctest import utils
 from xdoctest import constants
 from xdoctest import directive
@@ -17,6 +16,17 @@ ELLIPSIS_MARKER = '...'  # nocover
 
 TRAILING_WS = re.compile(r"[ \t]*$", re.UNICODE | re.MULTILINE)  # nocover
 
+# MODIFICATION: the ellipsis consumes all whitespace around it
+# for compatibility with whitespace normalization.
+_ELLIPSIS_SPLIT_RE = re.compile(
+    r'\s*{}\s*'.format(re.escape(ELLIPSIS_MARKER)), flags=re.MULTILINE)
+
+_WHITESPACE_RE = re.compile(r'\s', flags=re.MULTILINE)
+
+_BLANKLINE_RE = re.compile('|'.join([
+    '{pos_lb}{marker}\n', '{marker}\n', '\n{marker}', '{marker}']).format(
+        marker=BLANKLINE_MARKER, pos_lb='(?<=\n)'))  # positive lookbehind
+
 
 _EXCEPTION_RE = re.compile(r"""
     # Grab the traceback header.  Different versions of Python have
@@ -199,10 +209,7 @@ def _ellipsis_match(got, want):
 
     # Find "the real" strings.
     # ws = want.split(ELLIPSIS_MARKER)
-    # MODIFICATION: the ellipsis consumes all whitespace around it
-    # for compatibility with whitespace normalization.
-    ws = re.split('\s*{}\s*'.format(re.escape(ELLIPSIS_MARKER)), want,
-                  flags=re.MULTILINE)
+    ws = _ELLIPSIS_SPLIT_RE.split(want)
     assert len(ws) >= 2
 
     # Deal with exact matches possibly needed at one or both ends.
@@ -257,7 +264,7 @@ def normalize(got, want, runstate=None):
         runstate = directive.RuntimeState()
 
     def remove_prefixes(regex, text):
-        return re.sub(regex, r'\1\2', text)
+        return regex.sub(r'\1\2', text)
 
     def visible_text(lines):
         # TODO: backspaces
@@ -282,8 +289,8 @@ def normalize(got, want, runstate=None):
         want = remove_blankline_marker(want)
 
     # always remove trailing whitepsace
-    got = re.sub(TRAILING_WS, '', got)
-    want = re.sub(TRAILING_WS, '', want)
+    got = TRAILING_WS.sub('', got)
+    want = TRAILING_WS.sub('', want)
     # normalize endling newlines
     want = want.rstrip()
     got = got.rstrip()
@@ -305,8 +312,8 @@ def normalize(got, want, runstate=None):
 
     if runstate['IGNORE_WHITESPACE']:
         # Completely remove whitespace
-        got = re.sub('\s', '', got, flags=re.MULTILINE)
-        want = re.sub('\s', '', want, flags=re.MULTILINE)
+        got = _WHITESPACE_RE.sub('', got)
+        want = _WHITESPACE_RE.sub('', want)
 
     if runstate['NORMALIZE_REPR']:
         def norm_repr(a, b):
@@ -382,6 +389,7 @@ class GotWantException(AssertionError):
 
         # Check if we should use diff.
         if self._do_a_fancy_diff(runstate):
+            import difflib
             # Split want & got into lines.
             want_lines = want.splitlines(True)
             got_lines = got.splitlines(True)
@@ -471,13 +479,13 @@ def remove_blankline_marker(text):
         >>> assert BLANKLINE_MARKER not in remove_blankline_marker(text4)
         >>> assert BLANKLINE_MARKER not in remove_blankline_marker(text5)
     """
-    pos_lb = '(?<=\n)'  # positive lookbehind
-    blankline_pattern = '|'.join([
-        '{pos_lb}{marker}\n', '{marker}\n',
-        '\n{marker}', '{marker}']).format(
-            marker=BLANKLINE_MARKER, pos_lb=pos_lb)
+    if BLANKLINE_MARKER not in text:
+        return text
     # blankline_pattern = r'(?<=\n)[ ]*{}\n?'.format(re.escape(BLANKLINE_MARKER))
-    new_text = re.sub(blankline_pattern, '\n', text, re.MULTILINE)
+    # NOTE: this used to be called as re.sub(pattern, '\n', text,
+    # re.MULTILINE), which passes the flag as the replacement count.
+    # Keep that count so results are unchanged.
+    new_text = _BLANKLINE_RE.sub('\n', text, re.MULTILINE)
     return new_text
 
 
@@ -1,2 +1,11 @@
 # sentinal value
 NOT_EVALED = object()  # nocover
+
+
+# Styles that can be used to find doctests in a docstring
+DOCTEST_STYLES = [
+    'freeform',
+    'google',
+    'auto',
+    # 'numpy',  # TODO
+]
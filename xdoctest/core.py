@@ -4,8 +4,11 @@ Core methods used by xdoctest runner and plugin code to statically extract
 doctests from a module or package.
 """
 from __future__ import print_function, division, absolute_import, unicode_literals
+import io
+import re
 import sys
 import textwrap
+import collections
 import warnings
 import six
 import itertools as it
@@ -15,6 +18,7 @@ from xdoctest import dynamic_analysis as dynamic
 from xdoctest import static_analysis as static
 from xdoctest import parser
 from xdoctest import exceptions
+from xdoctest import constants
 from xdoctest import doctest_example
 from xdoctest import utils  # NOQA
 from xdoctest.docstr import docscrape_google
@@ -23,12 +27,7 @@ from xdoctest.docstr import docscrape_google
 DEBUG = False
 
 
-DOCTEST_STYLES = [
-    'freeform',
-    'google',
-    'auto',
-    # 'numpy',  # TODO
-]
+DOCTEST_STYLES = constants.DOCTEST_STYLES
 
 
 def parse_freeform_docstr_examples(docstr, callname=None, modpath=None,
@@ -191,6 +190,8 @@ def parse_google_docstr_examples(docstr, callname=None, modpath=None, lineno=1,
     Parses Google-style doctests from a docstr and generates example objects
 
     Args:
+        docstr (str | DocstrLines): a docstring or its precomputed line table
+
         lineno (int): the line number (starting from 1) of the docstring.
             (i.e. if you were to go to this line number in the source file
              the starting quotes of the docstr would be on this line).
@@ -225,16 +226,33 @@ def parse_google_docstr_examples(docstr, callname=None, modpath=None, lineno=1,
 
 
 def parse_auto_docstr_examples(docstr, *args, **kwargs):
-    """
+    r"""
     First try to parse google style, but if no tests are found use freeform
     style.
+
+    The docstring is scanned into a `DocstrLines` table once. Google parsing
+    reads its blocks from the table, and the freeform fallback only runs if
+    the table has a line with a ``>>>`` prompt (otherwise it cannot find
+    anything).
+
+    Example:
+        >>> from xdoctest.core import *
+        >>> docstr = 'summary\n\n>>> x = 1\n'
+        >>> [e.block_type for e in parse_auto_docstr_examples(docstr)]
+        [None]
+        >>> docstr = 'summary\n\nExample:\n    >>> x = 1\n'
+        >>> [e.block_type for e in parse_auto_docstr_examples(docstr)]
+        ['Example']
+        >>> list(parse_auto_docstr_examples('no examples here'))
+        []
     """
     if DEBUG:
         print('Automatic style is trying google parsing')
 
+    table = docscrape_google.DocstrLines(docstr)
     n_found = 0
     try:
-        for example in parse_google_docstr_examples(docstr, *args, **kwargs):
+        for example in parse_google_docstr_examples(table, *args, **kwargs):
             n_found += 1
             yield example
     except Exception:
@@ -242,7 +260,7 @@ def parse_auto_docstr_examples(docstr, *args, **kwargs):
             raise
 
     # no google style tests were found, parse in freeform
-    if n_found == 0:
+    if n_found == 0 and table.has_ps1:
         if DEBUG:
             print('Automatic style is trying freeform parsing')
         for example in parse_freeform_docstr_examples(docstr, *args, **kwargs):
@@ -310,10 +328,27 @@ def parse_docstr_examples(docstr, callname=None, modpath=None, lineno=1,
 
     n_parsed = 0
     try:
-        for example in parser(docstr, callname=callname, modpath=modpath,
-                              fpath=fpath, lineno=lineno):
-            n_parsed += 1
-            yield example
+        memo_key = (docstr, style)
+        templates = _parse_memo_get(memo_key)
+        if templates is not None:
+            # This docstring was parsed before; only rebind its location
+            for docsrc, offset, num, block_type, parts in templates:
+                example = doctest_example.DocTest(
+                    docsrc, modpath, callname, num, lineno=lineno + offset,
+                    fpath=fpath, block_type=block_type)
+                example._parts = parts
+                n_parsed += 1
+                yield example
+        else:
+            templates = []
+            for example in parser(docstr, callname=callname, modpath=modpath,
+                                  fpath=fpath, lineno=lineno):
+                templates.append((example.docsrc, example.lineno - lineno,
+                                  example.num, example.block_type,
+                                  example._parts))
+                n_parsed += 1
+                yield example
+            _parse_memo_put(memo_key, templates)
     except Exception as ex:
         if DEBUG:
             print('Caught an error when parsing')
@@ -345,6 +380,71 @@ def parse_docstr_examples(docstr, callname=None, modpath=None, lineno=1,
         print('Finished parsing {} examples'.format(n_parsed))
 
 
+# Parsed examples keyed by (docstr, style). Large code bases repeat the same
+# docstring many times (mixins, functools.wraps, re-exported classes), so each
+# distinct docstring is parsed once and later copies reuse its parts. Parts
+# are positioned relative to their example, so they can be shared.
+_PARSE_MEMO = collections.OrderedDict()
+_PARSE_MEMO_MAX = 4096
+_PARSE_MEMO_STATS = {'hits': 0, 'misses': 0}
+
+
+def _parse_memo_get(key):
+    try:
+        templates = _PARSE_MEMO.pop(key)
+    except KeyError:
+        _PARSE_MEMO_STATS['misses'] += 1
+        return None
+    # Reinsert to mark the entry as the most recently used
+    _PARSE_MEMO[key] = templates
+    _PARSE_MEMO_STATS['hits'] += 1
+    return templates
+
+
+def _parse_memo_put(key, templates):
+    _PARSE_MEMO[key] = templates
+    while len(_PARSE_MEMO) > _PARSE_MEMO_MAX:
+        _PARSE_MEMO.popitem(last=False)
+
+
+def parse_memo_info():
+    """
+    Reports how often parsed docstrings were reused.
+
+    Returns:
+        dict: number of memo hits, misses, entries, and the hit rate
+
+    Example:
+        >>> from xdoctest.core import *
+        >>> docstr = '>>> x = 1'
+        >>> before = parse_memo_info()
+        >>> a = list(parse_docstr_examples(docstr, 'a', fpath='a.txt'))
+        >>> b = list(parse_docstr_examples(docstr, 'b', fpath='b.txt'))
+        >>> after = parse_memo_info()
+        >>> assert after['hits'] > before['hits']
+        >>> assert b[0]._parts is a[0]._parts and b[0].callname == 'b'
+    """
+    hits = _PARSE_MEMO_STATS['hits']
+    misses = _PARSE_MEMO_STATS['misses']
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'size': len(_PARSE_MEMO),
+        'hit_rate': (hits / total) if total else 0.0,
+    }
+
+
+def format_parse_memo_info():
+    """
+    Returns a one line summary of `parse_memo_info`.
+    """
+    info = parse_memo_info()
+    return ('xdoctest docstring memo: {hits} hits, {misses} misses '
+            '({percent:.1f}% hit rate, {size} cached)').format(
+                percent=100 * info['hit_rate'], **info)
+
+
 def _rectify_to_modpath(modpath_or_name):
     """ if modpath_or_name is a name, statically converts it to a path """
     modpath = static.modname_to_modpath(modpath_or_name)
@@ -356,7 +456,116 @@ def _rectify_to_modpath(modpath_or_name):
     return modpath
 
 
-def package_calldefs(modpath_or_name, exclude=[], ignore_syntax_errors=True):
+class _NameIndex(object):
+    """
+    Records the names of the callables each module of a package defines, so
+    a run that targets one name can skip the modules that do not define it.
+
+    Entries are invalidated by the modification time and size of a module.
+    The index is kept for the lifetime of the process and, if
+    `dynamic.CACHE_DPATH` is set, stored there between sessions.
+
+    Example:
+        >>> from xdoctest import static_analysis as static
+        >>> modpath = static.modname_to_modpath('xdoctest.core')
+        >>> index = _NameIndex(modpath)
+        >>> calldefs = static.parse_calldefs(fpath=modpath)
+        >>> index.update(modpath, calldefs)
+        >>> entry = index.lookup(modpath)
+        >>> doclineno, doclineno_end = entry['names']['package_calldefs']
+        >>> assert doclineno < doclineno_end
+        >>> assert 'parse_memo_info' in entry['zero_args']
+        >>> # An unchanged module does not need to be saved again
+        >>> index.dirty = False
+        >>> index.update(modpath, calldefs)
+        >>> assert not index.dirty
+    """
+    def __init__(self, pkgpath):
+        import os
+        self.key = (os.path.realpath(pkgpath), sys.version)
+        self.dirty = False
+        entries = _NAME_INDEXES.get(self.key, None)
+        if entries is None:
+            entries = _NAME_INDEXES[self.key] = self._load()
+        self.entries = entries
+
+    def _fpath(self):
+        import hashlib
+        import os
+        hashid = hashlib.sha1(repr(self.key).encode('utf8')).hexdigest()
+        return os.path.join(dynamic.CACHE_DPATH, 'names_' + hashid + '.json')
+
+    def _load(self):
+        if not dynamic.CACHE_DPATH:
+            return {}
+        import json
+        try:
+            with open(self._fpath(), 'r') as file:
+                data = json.load(file)
+        except (IOError, OSError, ValueError):
+            return {}
+        if data.get('key') != list(self.key):
+            return {}
+        return data['entries']
+
+    @staticmethod
+    def _stat(modpath):
+        import os
+        stat = os.stat(modpath)
+        return [stat.st_mtime, stat.st_size]
+
+    def lookup(self, modpath):
+        """
+        Returns the entry of an unchanged module or None
+        """
+        entry = self.entries.get(modpath, None)
+        if entry is not None and entry['stat'] == self._stat(modpath):
+            return entry
+        return None
+
+    def update(self, modpath, calldefs):
+        entry = {
+            'stat': self._stat(modpath),
+            # Each name is mapped to the line span of its docstring
+            'names': {callname: [calldef.doclineno, calldef.doclineno_end]
+                      for callname, calldef in calldefs.items()},
+            'zero_args': sorted(callname
+                                for callname, calldef in calldefs.items()
+                                if _has_zero_args(calldef)),
+        }
+        if self.entries.get(modpath, None) != entry:
+            self.entries[modpath] = entry
+            self.dirty = True
+
+    def save(self):
+        if not self.dirty or not dynamic.CACHE_DPATH:
+            return
+        import json
+        import os
+        import tempfile
+        data = {'key': list(self.key), 'entries': self.entries}
+        try:
+            if not os.path.exists(dynamic.CACHE_DPATH):
+                os.makedirs(dynamic.CACHE_DPATH)
+            fd, tmp_fpath = tempfile.mkstemp(dir=dynamic.CACHE_DPATH,
+                                             suffix='.tmp')
+            with os.fdopen(fd, 'w') as file:
+                json.dump(data, file)
+            if six.PY2:  # nocover
+                os.rename(tmp_fpath, self._fpath())
+            else:
+                os.replace(tmp_fpath, self._fpath())
+        except (IOError, OSError):  # nocover
+            pass
+        self.dirty = False
+
+
+# Maps the key of each package's name index to its entries
+_NAME_INDEXES = {}
+
+
+def package_calldefs(modpath_or_name, exclude=[], ignore_syntax_errors=True,
+                     callnames=None):
     """
     Statically generates all callable definitions in a module or package
 
@@ -365,6 +574,10 @@ def package_calldefs(modpath_or_name, exclude=[], ignore_syntax_errors=True):
         exclude (list): glob-patterns of file names to exclude
         ignore_syntax_errors (bool): if False raise an error when syntax errors
             occur in a doctest (default True)
+        callnames (set): if specified, statically parsed modules that are
+            known (from the name index) to define none of these names (as a
+            callable with a docstring or without required arguments) are
+            skipped. The name index is only built and stored for such runs.
 
     Example:
         >>> modpath_or_name = 'xdoctest.core'
@@ -378,6 +591,14 @@ def package_calldefs(modpath_or_name, exclude=[], ignore_syntax_errors=True):
 
     modpaths = static.package_modpaths(pkgpath, with_pkg=True, with_libs=True)
     modpaths = list(modpaths)
+
+    FORCE_DYNAMIC = '--xdoc-force-dynamic' in sys.argv
+    # if false just skip extension modules
+    ALLOW_DYNAMIC = '--no-xdoc-dynamic' not in sys.argv
+
+    # Decide how to parse each module up front, so extension modules can be
+    # imported in parallel subprocesses while the others are parsed here.
+    todo = []
     for modpath in modpaths:
         modname = static.modpath_to_modname(modpath)
         if any(fnmatch(modname, pat) for pat in exclude):
@@ -388,19 +609,34 @@ def package_calldefs(modpath_or_name, exclude=[], ignore_syntax_errors=True):
                 'Is it an old pyc file?'.format(modname))
             continue
 
-        FORCE_DYNAMIC = '--xdoc-force-dynamic' in sys.argv
-        # if false just skip extension modules
-        ALLOW_DYNAMIC = '--no-xdoc-dynamic' not in sys.argv
-
-        if FORCE_DYNAMIC:
+        # Some modules can only be parsed dynamically
+        needs_dynamic = modpath.endswith(static._platform_pylib_exts())
+        if needs_dynamic and ALLOW_DYNAMIC:
+            # Isolate extension modules, which might crash when imported
+            mode = 'isolated'
+        elif FORCE_DYNAMIC:
             # Force dynamic parsing for everything
-            do_dynamic = True
+            mode = 'dynamic'
         else:
-            # Some modules can only be parsed dynamically
-            needs_dynamic = modpath.endswith(static._platform_pylib_exts())
-            do_dynamic = needs_dynamic and ALLOW_DYNAMIC
+            mode = 'static'
+        todo.append((modpath, modname, mode))
 
-        if do_dynamic:
+    isolated = dynamic.iter_isolated_calldefs(
+        [modpath for modpath, _, mode in todo if mode == 'isolated'])
+
+    # The name index only helps runs that target specific names
+    index = None if callnames is None else _NameIndex(pkgpath)
+
+    for modpath, modname, mode in todo:
+        if mode == 'isolated':
+            _, calldefs, ex = next(isolated)
+            if ex is not None:
+                msg = 'Cannot dynamically parse module={} at path={}.\nCaused by: {}'
+                msg = msg.format(modname, modpath, ex)
+                warnings.warn(msg)
+            else:
+                yield calldefs, modpath
+        elif mode == 'dynamic':
             try:
                 calldefs = dynamic.parse_dynamic_calldefs(modpath)
             except ImportError as ex:
@@ -416,6 +652,12 @@ def package_calldefs(modpath_or_name, exclude=[], ignore_syntax_errors=True):
             else:
                 yield calldefs, modpath
         else:
+            if index is not None:
+                entry = index.lookup(modpath)
+                if entry is not None and not any(
+                        name in entry['names'] or name in entry['zero_args']
+                        for name in callnames):
+                    continue
             try:
                 calldefs = static.parse_calldefs(fpath=modpath)
             except SyntaxError as ex:
@@ -428,11 +670,27 @@ def package_calldefs(modpath_or_name, exclude=[], ignore_syntax_errors=True):
                 else:
                     raise SyntaxError(msg)
             else:
+                if index is not None:
+                    index.update(modpath, calldefs)
                 yield calldefs, modpath
+    if index is not None:
+        index.save()
+
+
+def _has_zero_args(calldef):
+    """
+    True if a statically parsed callable can be called without arguments
+    """
+    if calldef.args is None:
+        return False
+    # The only existing args should have defaults
+    n_args = len(calldef.args.args) - len(calldef.args.defaults)
+    return n_args == 0
 
 
 def parse_doctestables(modpath_or_name, exclude=[], style='auto',
-                       ignore_syntax_errors=True):
+                       ignore_syntax_errors=True, zero_arg_index=None,
+                       callnames=None):
     """
     Parses all doctests within top-level callables of a module and generates
     example objects.  The style influences which tests are found.
@@ -443,6 +701,11 @@ def parse_doctestables(modpath_or_name, exclude=[], style='auto',
         style (str): expected doctest style (e.g. google, freeform, auto)
         ignore_syntax_errors (bool): if False raise an error when syntax errors
             occur in a doctest (default True)
+        zero_arg_index (dict): if specified, the name of every callable that
+            can be called without arguments is mapped to the list of paths
+            of the modules that define it, as a side effect of parsing.
+        callnames (set): if specified, only the docstrings of callables with
+            these names are parsed (see also `package_calldefs`)
 
     Yields:
         xdoctest.doctest_example.DocTest : parsed doctest example objects
@@ -475,6 +738,13 @@ def parse_doctestables(modpath_or_name, exclude=[], style='auto',
         >>> examples = list(parse_doctestables(modpath, style='freeform'))
         >>> print(len(examples))
         1
+
+    Example:
+        >>> zero_arg_index = {}
+        >>> _ = list(parse_doctestables('xdoctest.core',
+        >>>                             zero_arg_index=zero_arg_index))
+        >>> assert 'parse_memo_info' in zero_arg_index
+        >>> assert 'parse_doctestables' not in zero_arg_index
     """
 
     if style not in DOCTEST_STYLES:
@@ -483,8 +753,13 @@ def parse_doctestables(modpath_or_name, exclude=[], style='auto',
 
     # Statically parse modules and their doctestable callables in a package
     for calldefs, modpath in package_calldefs(modpath_or_name, exclude,
-                                              ignore_syntax_errors):
+                                              ignore_syntax_errors,
+                                              callnames=callnames):
         for callname, calldef in calldefs.items():
+            if zero_arg_index is not None and _has_zero_args(calldef):
+                zero_arg_index.setdefault(callname, []).append(modpath)
+            if callnames is not None and callname not in callnames:
+                continue
             docstr = calldef.docstr
             if calldef.docstr is not None:
                 lineno = calldef.doclineno
@@ -495,6 +770,240 @@ def parse_doctestables(modpath_or_name, exclude=[], style='auto',
                     yield example
 
 
+#: File extensions of documentation files searched by `parse_docs_tree`
+DOC_EXTENSIONS = ('.rst', '.md', '.txt')
+
+_FENCE_RE = re.compile(r'^\s*(`{3,}|~{3,})')
+
+
+def _has_prompt(fpath, chunksize=1 << 16):
+    """
+    Checks if a file contains ``>>>`` without decoding or splitting it.
+    """
+    with open(fpath, 'rb') as file:
+        tail = b''
+        while True:
+            chunk = file.read(chunksize)
+            if not chunk:
+                return False
+            if b'>>>' in tail + chunk[:2] or b'>>>' in chunk:
+                return True
+            tail = chunk[-2:]
+
+
+def _iter_prompt_blocks(lines):
+    r"""
+    Finds the code blocks of a documentation file that contain prompts.
+
+    A code block is either the body of a markdown fence (``` or ~~~), a
+    block indented past the surrounding prose (e.g. after an rst ``::`` or
+    ``.. code-block::``), or a paragraph that starts with ``>>>``.
+
+    Args:
+        lines (Iterable[str]): lines of the file
+
+    Yields:
+        Tuple[int, List[str]]: index of the first line of each block that
+            contains a ``>>>`` prompt and the (right stripped) lines of it
+
+    Example:
+        >>> from xdoctest.core import _iter_prompt_blocks
+        >>> lines = [
+        >>>     'Prose with a block::', '', '    >>> x = 1', '',
+        >>>     '```python', 'y = 2', '```', '', '>>> print(x)', '1']
+        >>> list(_iter_prompt_blocks(lines))
+        [(2, ['    >>> x = 1']), (8, ['>>> print(x)', '1'])]
+    """
+    state = None
+    fence = None
+    base_indent = 0
+    prose_indent = 0
+    start = 0
+    block = []
+
+    def _emit(block):
+        while block and not block[-1].strip():
+            block.pop()
+        return any(line.lstrip().startswith('>>>') for line in block)
+
+    for index, line in enumerate(lines):
+        line = line.rstrip()
+        stripped = line.lstrip()
+        if state == 'fence':
+            if stripped.startswith(fence) and not stripped.strip(fence[0]):
+                if _emit(block):
+                    yield start, block
+                state = None
+            else:
+                block.append(line)
+            continue
+        if state == 'indent':
+            if not stripped or len(line) - len(stripped) > base_indent:
+                block.append(line)
+                continue
+            if _emit(block):
+                yield start, block
+            state = None
+        elif state == 'para':
+            if stripped:
+                block.append(line)
+                continue
+            if _emit(block):
+                yield start, block
+            state = None
+            continue
+        if not stripped:
+            continue
+        indent = len(line) - len(stripped)
+        match = _FENCE_RE.match(line)
+        if match:
+            state, fence = 'fence', match.group(1)
+            start, block = index + 1, []
+        elif indent > prose_indent:
+            state, base_indent = 'indent', prose_indent
+            start, block = index, [line]
+        elif stripped.startswith('>>>'):
+            state = 'para'
+            start, block = index, [line]
+        else:
+            prose_indent = indent
+    if state is not None and _emit(block):
+        yield start, block
+
+
+def parse_docfile_examples(fpath, callname=None, style='freeform',
+                           encoding='utf-8'):
+    r"""
+    Parses the doctests in the code blocks of a documentation file.
+
+    Files without a ``>>>`` are skipped without being decoded. Otherwise the
+    file is streamed line by line and only code blocks that contain prompts
+    are kept. Like a text file collected by the pytest plugin, all kept
+    blocks form a single example (per the style), and line numbers refer to
+    the documentation file.
+
+    Args:
+        fpath (str): path to a documentation file (e.g. rst or markdown)
+        callname (str): name of the examples, defaults to the file name
+        style (str): expected doctest style (e.g. google, freeform, auto)
+        encoding (str): text encoding of the file
+
+    Yields:
+        xdoctest.doctest_example.DocTest : parsed doctest example objects
+
+    Example:
+        >>> from xdoctest import utils
+        >>> from os.path import join
+        >>> text = utils.codeblock(
+        >>>     '''
+        >>>     Title
+        >>>     =====
+        >>>
+        >>>     Usage::
+        >>>
+        >>>         >>> x = 1
+        >>>
+        >>>     Some prose mentioning >>> in passing.
+        >>>
+        >>>     .. code-block:: python
+        >>>
+        >>>         >>> print(x + 1)
+        >>>         2
+        >>>     ''')
+        >>> with utils.TempDir() as temp:
+        >>>     fpath = join(temp.dpath, 'usage.rst')
+        >>>     with open(fpath, 'w') as file:
+        >>>         file.write(text)
+        >>>     examples = list(parse_docfile_examples(fpath))
+        >>>     assert len(examples) == 1
+        >>>     example = examples[0]
+        >>>     assert example.lineno == 6
+        >>>     assert example.run(verbose=0)['passed']
+    """
+    from os.path import basename
+    if not _has_prompt(fpath):
+        return
+    kept = []
+    with io.open(fpath, 'r', encoding=encoding) as file:
+        for start, block in _iter_prompt_blocks(file):
+            kept.append((start, block))
+    if not kept:
+        return
+    # Blank out everything between the kept blocks to preserve line numbers
+    first = kept[0][0]
+    lines = []
+    for start, block in kept:
+        lines.extend([''] * (start - first - len(lines)))
+        lines.extend(block)
+    docsrc = '\n'.join(lines)
+    if callname is None:
+        callname = basename(fpath)
+    for example in parse_docstr_examples(docsrc, callname=callname,
+                                         fpath=fpath, lineno=first + 1,
+                                         style=style):
+        # Documentation examples run like a script
+        example.globs['__name__'] = '__main__'
+        yield example
+
+
+def parse_docs_tree(dpath, exclude=[], style='freeform',
+                    exts=DOC_EXTENSIONS, encoding='utf-8'):
+    r"""
+    Parses the doctests in all documentation files under a directory.
+
+    Hidden directories are skipped and files are visited in sorted order.
+    Each file is handled by `parse_docfile_examples` and its examples are
+    named by the path of the file relative to `dpath`.
+
+    Args:
+        dpath (str): path to a directory (or a single documentation file)
+        exclude (list): glob-patterns of relative file paths to exclude
+        style (str): expected doctest style (e.g. google, freeform, auto)
+        exts (Tuple[str]): extensions of the files to search
+        encoding (str): text encoding of the files
+
+    Yields:
+        xdoctest.doctest_example.DocTest : parsed doctest example objects
+
+    Example:
+        >>> from xdoctest import utils
+        >>> from os.path import join
+        >>> import os
+        >>> with utils.TempDir() as temp:
+        >>>     os.makedirs(join(temp.dpath, 'guide'))
+        >>>     with open(join(temp.dpath, 'guide', 'intro.md'), 'w') as file:
+        >>>         file.write('Intro\n\n```python\n>>> 1 + 1\n2\n```\n')
+        >>>     with open(join(temp.dpath, 'plain.rst'), 'w') as file:
+        >>>         file.write('Nothing to test here\n')
+        >>>     examples = list(parse_docs_tree(temp.dpath))
+        >>> [example.callname for example in examples]
+        ['guide/intro.md']
+    """
+    import os
+    from os.path import isdir, join, relpath
+    if style not in DOCTEST_STYLES:
+        raise KeyError('Unknown style={}. Valid styles are {}'.format(
+            style, DOCTEST_STYLES))
+
+    if isdir(dpath):
+        fpaths = []
+        for root, dnames, fnames in os.walk(dpath):
+            dnames[:] = sorted(d for d in dnames if not d.startswith('.'))
+            fpaths.extend(join(root, fname) for fname in sorted(fnames)
+                          if fname.endswith(exts))
+    else:
+        fpaths = [dpath]
+        dpath = os.path.dirname(dpath)
+
+    for fpath in fpaths:
+        callname = relpath(fpath, dpath).replace(os.sep, '/')
+        if any(fnmatch(callname, pat) for pat in exclude):
+            continue
+        for example in parse_docfile_examples(fpath, callname=callname,
+                                              style=style, encoding=encoding):
+            yield example
+
+
 if __name__ == '__main__':
     """
     CommandLine:
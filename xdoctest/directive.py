@@ -118,12 +118,34 @@ DEFAULT_RUNTIME_STATE = {
 
     'SKIP': False,
 
+    # Examples of a module start from the namespace left by the first
+    # example that enabled this. See doctest_example.SharedNamespace.
+    'SHARED_NAMESPACE': False,
+
     # Original directives we are currently not supporting:
     # DONT_ACCEPT_TRUE_FOR_1
     # REPORT_ONLY_FIRST_FAILURE
 }
 
 
+# Each basic directive is assigned a single bit, so an entire runtime state
+# can be stored as a few integers. This makes lookups O(1) and copies trivial.
+_STATE_KEYS = sorted(DEFAULT_RUNTIME_STATE.keys())
+_STATE_BITS = {key: 1 << idx for idx, key in enumerate(_STATE_KEYS)}
+_REPORT_MASK = sum(bit for key, bit in _STATE_BITS.items()
+                   if key.startswith('REPORT_'))
+_DEFAULT_BITS = sum(_STATE_BITS[key] for key, value in
+                    DEFAULT_RUNTIME_STATE.items() if value)
+
+# Maps a (default_state, reportchoice) config to a prebuilt RuntimeState
+_CONFIGURED_STATES = {}
+
+
+def _set_bit(bits, bit, value):
+    """ helper to enable or disable a single bit """
+    return (bits | bit) if value else (bits & ~bit)
+
+
 class RuntimeState(utils.NiceRepr):
     """
     Maintains the runtime state for a single `run()` of an example
@@ -131,6 +153,9 @@ class RuntimeState(utils.NiceRepr):
     Inline directives are pushed and popped after the line is run.
     Otherwise directives persist until another directive disables it.
 
+    The state of every flag is packed into a bitfield, so copies are cheap and
+    independent: modifying a copy never modifies the state it was cloned from.
+
     Example:
         >>> from xdoctest.directive import *
         >>> runstate = RuntimeState()
@@ -161,19 +186,71 @@ class RuntimeState(utils.NiceRepr):
             REPORT_CDIFF: False,
             REPORT_NDIFF: False,
             REPORT_UDIFF: True,
+            SHARED_NAMESPACE: False,
             SKIP: False
         })>
     """
+    __slots__ = ('_global_bits', '_inline_bits', '_inline_mask')
+
     def __init__(self, default_state=None):
-        self._global_state = DEFAULT_RUNTIME_STATE.copy()
+        self._global_bits = _DEFAULT_BITS
+        self._inline_bits = 0
+        self._inline_mask = 0
         if default_state:
-            self._global_state.update(default_state)
-        self._inline_state = {}
+            for key, value in default_state.items():
+                if key not in _STATE_BITS:
+                    warnings.warn('Unknown state: {}'.format(key))
+                    continue
+                self[key] = value
+
+    @classmethod
+    def from_config(cls, default_state=None, reportchoice=None):
+        """
+        Returns a fresh copy of the runtime state for a particular
+        configuration. The configured state is only built once and is then
+        cloned on each call.
+
+        Args:
+            default_state (dict): overrides of `DEFAULT_RUNTIME_STATE`
+            reportchoice (str): name of the report style (e.g. udiff)
+
+        Example:
+            >>> from xdoctest.directive import *
+            >>> runstate1 = RuntimeState.from_config({'SKIP': True}, 'ndiff')
+            >>> runstate2 = RuntimeState.from_config({'SKIP': True}, 'ndiff')
+            >>> assert runstate1['SKIP'] and runstate1['REPORT_NDIFF']
+            >>> runstate1['SKIP'] = False
+            >>> assert runstate2['SKIP']
+        """
+        items = frozenset(default_state.items()) if default_state else None
+        key = (items, reportchoice)
+        base = _CONFIGURED_STATES.get(key, None)
+        if base is None:
+            base = cls(default_state)
+            if reportchoice is not None:
+                base.set_report_style(reportchoice)
+            _CONFIGURED_STATES[key] = base
+        return base.copy()
+
+    def copy(self):
+        """
+        Returns an independent snapshot of this state in constant time.
+
+        Example:
+            >>> from xdoctest.directive import *
+            >>> runstate = RuntimeState()
+            >>> snapshot = runstate.copy()
+            >>> runstate['SKIP'] = True
+            >>> assert not snapshot['SKIP']
+        """
+        new = RuntimeState.__new__(RuntimeState)
+        new._global_bits = self._global_bits
+        new._inline_bits = self._inline_bits
+        new._inline_mask = self._inline_mask
+        return new
 
     def to_dict(self):
-        state = self._global_state.copy()
-        state.update(self._inline_state)
-        state = OrderedDict(sorted(state.items()))
+        state = OrderedDict([(key, self[key]) for key in _STATE_KEYS])
         return state
 
     def __nice__(self):
@@ -181,20 +258,29 @@ class RuntimeState(utils.NiceRepr):
                                for item in self.to_dict().items()]) + '}'
 
     def __getitem__(self, key):
-        if key not in self._global_state:
+        try:
+            bit = _STATE_BITS[key]
+        except KeyError:
             raise KeyError('Unknown key: {}'.format(key))
-        if key in self._inline_state:
-            return self._inline_state[key]
+        if self._inline_mask & bit:
+            return bool(self._inline_bits & bit)
         else:
-            return self._global_state[key]
+            return bool(self._global_bits & bit)
 
     def __setitem__(self, key, value):
-        if key not in self._global_state:
+        try:
+            bit = _STATE_BITS[key]
+        except KeyError:
             raise KeyError('Unknown key: {}'.format(key))
-        self._global_state[key] = value
+        self._global_bits = _set_bit(self._global_bits, bit, value)
 
     def set_report_style(self, reportchoice, state=None):
         """
+        Args:
+            reportchoice (str): name of the report style, e.g. ``'ndiff'``
+            state (None): ignored, the global state of this object is always
+                modified. Kept so existing callers continue to work.
+
         Example:
             >>> from xdoctest.directive import *
             >>> runstate = RuntimeState()
@@ -202,31 +288,33 @@ class RuntimeState(utils.NiceRepr):
             >>> runstate.set_report_style('ndiff')
             >>> assert not runstate['REPORT_UDIFF']
             >>> assert runstate['REPORT_NDIFF']
+            >>> runstate.set_report_style('cdiff', state=None)
+            >>> assert runstate['REPORT_CDIFF']
         """
         # When enabling a report flag, toggle all others off
-        if state is None:
-            state = self._global_state
-        for k in state.keys():
-            if k.startswith('REPORT_'):
-                state[k] = False
-        state['REPORT_' + reportchoice.upper()] = True
+        bit = _STATE_BITS.get('REPORT_' + reportchoice.upper(), 0)
+        self._global_bits = (self._global_bits & ~_REPORT_MASK) | bit
 
     def update(self, directives):
-        self._inline_state.clear()
+        self._inline_bits = 0
+        self._inline_mask = 0
         for directive in directives:
             key, value = directive.state_item()
             if key == 'NOOP':
                 continue
-            if key not in self._global_state:
+            bit = _STATE_BITS.get(key, None)
+            if bit is None:
                 warnings.warn('Unknown state: {}'.format(key))
-            if directive.inline:
-                state = self._inline_state
-            else:
-                state = self._global_state
+                continue
 
             if key.startswith('REPORT_') and value:
                 self.set_report_style(key.replace('REPORT_', ''))
-            state[key] = value
+
+            if directive.inline:
+                self._inline_mask |= bit
+                self._inline_bits = _set_bit(self._inline_bits, bit, value)
+            else:
+                self._global_bits = _set_bit(self._global_bits, bit, value)
 
 
 class Directive(utils.NiceRepr):
@@ -304,6 +392,11 @@ class Directive(utils.NiceRepr):
             else:
                 key = 'NOOP'
                 value = True
+        elif self.name == 'TIMEOUT':
+            # The time limit applies to the whole example and is read by the
+            # example itself. It does not change the runtime state.
+            key = 'NOOP'
+            value = True
         else:
             key = self.name
             value = self.positive
@@ -313,6 +406,8 @@ class Directive(utils.NiceRepr):
 COMMANDS = list(DEFAULT_RUNTIME_STATE.keys()) + [
     # Define extra commands that can resolve to a runtime state modification
     'REQUIRES',
+    # Limits the wall time of the example, see DocTest.timeout
+    'TIMEOUT',
 ]
 DIRECTIVE_PATTERNS = [
     #r'\s*\+\s*' + named('style1', '.*'),
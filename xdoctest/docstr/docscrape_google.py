@@ -5,11 +5,32 @@ Handles parsing of information out of google style docstrings
 from __future__ import absolute_import, division, print_function, unicode_literals
 import re
 import textwrap
-import collections
 import six
 from xdoctest import exceptions
 
 
+# List of google style tags grouped by alias
+TAG_GROUPS = [
+    ['Args', 'Arguments', 'Parameters', 'Other Parameters'],
+    ['Kwargs', 'Keyword Args', 'Keyword Arguments'],
+    ['Warns', 'Warning', 'Warnings'],
+    ['Returns', 'Return'],
+    ['Example', 'Examples'],
+    ['Doctest'],
+    ['Note', 'Notes'],
+    ['Yields', 'Yield'],
+    ['Attributes'],
+    ['Methods'],
+    ['Raises'],
+    ['References'],
+    ['See Also'],
+    ['Todo'],
+]
+# Map aliased tags to a cannonical name (the first item in the group).
+TAG_ALIASES = dict([(item, group[0]) for group in TAG_GROUPS for item in group])
+_TAG_RE = re.compile('^' + '(' + '|'.join(TAG_ALIASES.keys()) + '): *$')
+
+
 def parse_google_args(docstr):
     r"""
     Generates dictionaries of argument hints based on a google docstring
@@ -234,7 +255,7 @@ def split_google_docblocks(docstr):
     """ Breaks a docstring into parts defined by google style
 
     Args:
-        docstr (str): a docstring
+        docstr (str | DocstrLines): a docstring or its precomputed line table
 
     Returns:
         list: list of 2-tuples where the first item is a google style docstring
@@ -296,101 +317,47 @@ def split_google_docblocks(docstr):
         >>> print('offset = {!r}'.format(offset))
         >>> assert offset == 1
     """
-    if not isinstance(docstr, six.string_types):
+    if isinstance(docstr, DocstrLines):
+        table = docstr
+    elif isinstance(docstr, six.string_types):
+        table = DocstrLines(docstr)
+    else:
         raise TypeError('Input docstr must be a string. Got {} instead'.format(
             type(docstr)))
 
-    def get_indentation(line_):
-        """ returns number of preceding spaces """
-        return len(line_) - len(line_.lstrip())
-
-    # Parse out initial documentation lines
-    # Then parse out the blocked lines.
-    docstr = textwrap.dedent(docstr)
-    docstr_lines = docstr.split('\n')
-    line_indent = [get_indentation(line) for line in docstr_lines]
-    line_len = [len(line) for line in docstr_lines]
-
-    # The first line may not have the correct indentation if it starts
-    # right after the triple quotes. Adjust it in this case to ensure that
-    # base indent is always 0
-    adjusted = False
-    is_nonzero = [len_ > 0 for len_ in line_len]
-    if len(line_indent) >= 2:
-        if line_len[0] != 0:
-            indents = [x for x, f in zip(line_indent, is_nonzero) if f]
-            if len(indents) >= 2:
-                indent_adjust = min(indents[1:])
-                line_indent[0] += indent_adjust
-                line_len[0] += indent_adjust
-                docstr_lines[0] = (' ' * indent_adjust) + docstr_lines[0]
-                adjusted = True
-    if adjusted:
-        # Redo prepreocessing, but this time on a rectified input
-        docstr = textwrap.dedent('\n'.join(docstr_lines))
-        docstr_lines = docstr.split('\n')
-        line_indent = [get_indentation(line) for line in docstr_lines]
-        line_len = [len(line) for line in docstr_lines]
-
-    indents = [x for x, f in zip(line_indent, is_nonzero) if f]
-    if len(indents) >= 1:
-        if indents[0] != 0:
-            # debug info
-            print('ERROR IN PARSING DOCSTRING')
-            print('adjusted = %r' % (adjusted,))
-            print('Docstring:')
-            print('----------')
-            print(docstr)
-            print('----------')
-            raise exceptions.MalformedDocstr('malformed google docstr')
+    docstr_lines = table.lines
+    line_len = table.lens
+    true_indent = table.indents
+    is_tag = table.is_tag
+
+    if table.first_indent:
+        # debug info
+        print('ERROR IN PARSING DOCSTRING')
+        print('adjusted = %r' % (table.adjusted,))
+        print('Docstring:')
+        print('----------')
+        print('\n'.join(docstr_lines))
+        print('----------')
+        raise exceptions.MalformedDocstr('malformed google docstr')
 
     base_indent = 0
-    # We will group lines by their indentation.
-    # Rectify empty lines by giving them their parent's indentation.
-    true_indent = []
-    prev_indent = None
-    for indent_, len_ in zip(line_indent, line_len):
-        if len_ == 0:
-            # Empty lines take on their parents indentation
-            indent_ = prev_indent
-        true_indent.append(indent_)
-        prev_indent = indent_
-
-    # List of google style tags grouped by alias
-    tag_groups = [
-        ['Args', 'Arguments', 'Parameters', 'Other Parameters'],
-        ['Kwargs', 'Keyword Args', 'Keyword Arguments'],
-        ['Warns', 'Warning', 'Warnings'],
-        ['Returns', 'Return'],
-        ['Example', 'Examples'],
-        ['Doctest'],
-        ['Note', 'Notes'],
-        ['Yields', 'Yield'],
-        ['Attributes'],
-        ['Methods'],
-        ['Raises'],
-        ['References'],
-        ['See Also'],
-        ['Todo'],
-    ]
-    # Map aliased tags to a cannonical name (the first item in the group).
-    tag_aliases = dict([(item, group[0]) for group in tag_groups for item in group])
-    tag_pattern = '^' + '(' + '|'.join(tag_aliases.keys()) + '): *$'
 
     # Label lines by their group-id
     group_id = 0
     prev_indent = 0
     group_list = []
     in_tag = False
-    for line_num, (line, indent_) in enumerate(zip(docstr_lines, true_indent)):
-        if re.match(tag_pattern, line):
+    n_lines = len(docstr_lines)
+    for line_num in range(n_lines):
+        indent_ = true_indent[line_num]
+        if is_tag[line_num]:
             # Check if we can look ahead
-            if line_num + 1 < len(docstr_lines):
+            if line_num + 1 < n_lines:
                 # A tag is only valid if its next line is properly indented,
                 # empty, or is a tag itself.
                 indent_increase = true_indent[line_num + 1] > base_indent
                 indent_zero = line_len[line_num + 1] == 0
-                matches_tag = re.match(tag_pattern, docstr_lines[line_num + 1])
+                matches_tag = is_tag[line_num + 1]
                 if (indent_increase or indent_zero or matches_tag):
                     group_id += 1
                     in_tag = True
@@ -404,32 +371,118 @@ def split_google_docblocks(docstr):
         group_list.append(group_id)
         prev_indent = indent_
 
-    assert len(docstr_lines) == len(group_list)
-
-    # Group docstr lines by group list
-    groups_ = collections.defaultdict(list)
-    for groupid, line in zip(group_list, docstr_lines):
-        groups_[groupid].append(line)
-
+    # Group docstr lines by group list (group ids never decrease, so each
+    # group is a contiguous run of lines)
     groups = []
     line_offset = 0
-    for k, lines in groups_.items():
-        if len(lines) == 0 or (len(lines) == 1 and len(lines[0]) == 0):
-            line_offset += len(lines)
+    start = 0
+    for stop in range(1, n_lines + 1):
+        if stop < n_lines and group_list[stop] == group_list[start]:
             continue
-        elif len(lines) >= 1 and re.match(tag_pattern, lines[0]):
+        lines = docstr_lines[start:stop]
+        if len(lines) == 1 and len(lines[0]) == 0:
+            pass
+        elif is_tag[start]:
             # An encoded google sub-block
             key = lines[0].strip().rstrip(':')
             val = lines[1:]
             subblock = textwrap.dedent('\n'.join(val))
+            key = TAG_ALIASES.get(key, key)
+            groups.append((key, (subblock, line_offset)))
         else:
             # A top level text documentation block
-            key = '__DOC__'
-            val = lines[:]
-            subblock = '\n'.join(val)
-
-        key = tag_aliases.get(key, key)
-        block = (subblock, line_offset)
-        groups.append((key, block))
+            groups.append(('__DOC__', ('\n'.join(lines), line_offset)))
         line_offset += len(lines)
+        start = stop
     return groups
+
+
+class DocstrLines(object):
+    r"""
+    A dedented docstring split into lines, where each line is classified
+    once. Google blocks are split using this table, and auto style uses it to
+    skip the freeform parse when no line has a ``>>>`` prompt.
+
+    Attributes:
+        lines (List[str]): the dedented lines of the docstring
+        lens (List[int]): the length of each line
+        indents (List[int]): the indentation of each line. Empty lines take
+            on the indentation of the line before them.
+        is_tag (List[bool]): if each line is a google block header
+        has_ps1 (bool): if any line starts with a ``>>>`` prompt
+        first_indent (int): indentation of the first nonempty line
+        adjusted (bool): if the first line started right after the quotes
+            and the rest of the docstring was dedented relative to it
+
+    Example:
+        >>> from xdoctest.docstr.docscrape_google import *  # NOQA
+        >>> table = DocstrLines('summary\n\n    Example:\n        >>> pass\n    ')
+        >>> table.lines
+        ['summary', '', 'Example:', '    >>> pass', '']
+        >>> table.indents
+        [0, 0, 0, 4, 4]
+        >>> table.is_tag
+        [False, False, True, False, False]
+        >>> table.has_ps1
+        True
+    """
+    __slots__ = ('lines', 'lens', 'indents', 'is_tag', 'has_ps1',
+                 'first_indent', 'adjusted')
+
+    def __init__(self, docstr):
+        lines = textwrap.dedent(docstr).split('\n')
+
+        # The first line may not have the correct indentation if it starts
+        # right after the triple quotes. Adjust it in this case to ensure that
+        # base indent is always 0
+        adjusted = False
+        if len(lines) >= 2 and lines[0]:
+            rest = [_indentation(line) for line in lines[1:] if line]
+            if rest:
+                adjusted = True
+                margin = min(rest)
+                if margin:
+                    prefix = ' ' * margin
+                    if all(line.startswith(prefix) for line in lines[1:] if line):
+                        lines[1:] = [line[margin:] for line in lines[1:]]
+                    else:  # nocover
+                        # The margin mixes tabs and spaces; defer to dedent
+                        lines[0] = prefix + lines[0]
+                        lines = textwrap.dedent('\n'.join(lines)).split('\n')
+
+        # Classify each line
+        lens = []
+        indents = []
+        is_tag = []
+        has_ps1 = False
+        first_indent = None
+        prev_indent = None
+        for line in lines:
+            len_ = len(line)
+            if len_ == 0:
+                # Empty lines take on their parents indentation
+                indent_ = prev_indent
+                is_tag.append(False)
+            else:
+                indent_ = _indentation(line)
+                if first_indent is None:
+                    first_indent = indent_
+                is_tag.append(_TAG_RE.match(line) is not None)
+                if not has_ps1:
+                    has_ps1 = line.startswith('>>>', indent_)
+            lens.append(len_)
+            indents.append(indent_)
+            prev_indent = indent_
+
+        self.lines = lines
+        self.lens = lens
+        self.indents = indents
+        self.is_tag = is_tag
+        self.has_ps1 = has_ps1
+        self.first_indent = first_indent or 0
+        self.adjusted = adjusted
+
+
+def _indentation(line):
+    """ returns number of preceding spaces """
+    return len(line) - len(line.lstrip())
@@ -24,9 +24,14 @@ class Config(dict):
     """
     Static configuration for collection, execution, and reporting doctests.
     Note dynamic directives are not managed by Config, they use RuntimeState.
+
+    Example:
+        >>> config = Config({'colored': False})
+        >>> assert config['colored'] is False
+        >>> assert config['reportchoice'] == 'udiff'
     """
     def __init__(self, *args, **kwargs):
-        super(Config, self).__init__(*args, **kwargs)
+        super(Config, self).__init__()
         self.update({
             'colored': True,
             # 'colored': False,
@@ -43,7 +48,17 @@ class Config(dict):
             'reportchoice': 'udiff',
             'default_runtime_state': {},
             'verbose': 1,
+
+            # Limits on the wall time (in seconds) and on the memory growth
+            # (in megabytes) of each example. None means no limit.
+            'timeout': None,
+            'max_memory': None,
+
+            # Maximum number of characters of stdout captured per example.
+            # None means no limit.
+            'max_output': None,
         })
+        self.update(*args, **kwargs)
 
     def getvalue(self, key, given=None):
         if given is None:
@@ -52,6 +67,54 @@ class Config(dict):
             return given
 
 
+# Examples that never customize their config read from this shared instance.
+# It must never be modified; accessing `DocTest.config` makes a private copy.
+_DEFAULT_CONFIG = Config()
+
+
+class SharedNamespace(object):
+    r"""
+    A namespace shared by the examples of one module that enable the
+    SHARED_NAMESPACE directive.
+
+    The first such example to pass acts as the setup example. A snapshot of
+    the namespace it leaves behind is taken, and every later example starts
+    from a shallow copy of it. Expensive objects created by the setup example
+    are therefore built once, while names bound by one example do not leak
+    into the next. Note that mutating a shared object is visible to all
+    subsequent examples.
+
+    Example:
+        >>> from xdoctest import doctest_example
+        >>> shared = doctest_example.SharedNamespace()
+        >>> docsrc1 = '>>> # xdoctest: +SHARED_NAMESPACE\n>>> data = [1, 2]'
+        >>> docsrc2 = '>>> # xdoctest: +SHARED_NAMESPACE\n>>> x = len(data)'
+        >>> examples = [doctest_example.DocTest(docsrc1),
+        >>>             doctest_example.DocTest(docsrc2)]
+        >>> examples[0].globs['getfixture'] = lambda name: name
+        >>> for example in examples:
+        >>>     example.shared_namespace = shared
+        >>>     assert example.run(verbose=0)['passed']
+        >>> assert 'x' not in shared.snapshot
+        >>> assert 'getfixture' not in shared.snapshot
+        >>> assert shared.snapshot['data'] is examples[1].globs['data']
+    """
+    __slots__ = ('snapshot',)
+
+    def __init__(self):
+        self.snapshot = None
+
+    def clone(self, globs=None):
+        """
+        Returns a new namespace initialized from the snapshot and updated with
+        the example specific `globs` (e.g. values injected by pytest).
+        """
+        namespace = dict(self.snapshot)
+        if globs:
+            namespace.update(globs)
+        return namespace
+
+
 class DocTest(object):
     """
     Holds information necessary to execute and verify a doctest
@@ -80,13 +143,22 @@ class DocTest(object):
         <DocTest(xdoctest.doctest_example DocTest:0 ln ...)>
     """
 
+    __slots__ = ('block_type', '_config', 'modpath', 'fpath', 'modname',
+                 'callname', 'docsrc', 'lineno', 'num', '_parts', 'tb_lineno',
+                 'exc_info', 'failed_part', 'warn_list', 'logged_evals',
+                 'logged_stdout', '_unmatched_stdout', 'skipped_parts',
+                 '_runstate', 'module', '_globs', 'mode', '_partfilename',
+                 '_suppressed_stdout', 'shared_namespace', '_failure_lines',
+                 '_in_forked_child')
+
     def __init__(self, docsrc, modpath=None, callname=None, num=0,
                  lineno=1, fpath=None, block_type=None, mode='pytest'):
 
         # if we know the google block type it is recorded
         self.block_type = block_type
 
-        self.config = Config()
+        # Use the shared default config until this example needs its own
+        self._config = None
 
         self.modpath = modpath
         self.fpath = fpath
@@ -113,19 +185,58 @@ class DocTest(object):
         self.exc_info = None
         self.failed_part = None
         self.warn_list = None
+        # Failure report rendered by a forked child (see run_forked)
+        self._failure_lines = None
+        self._in_forked_child = False
 
-        self.logged_evals = OrderedDict()
-        self.logged_stdout = OrderedDict()
-        self._unmatched_stdout = []
-        self.skipped_parts = []
+        # Containers that only matter after the example is run are not
+        # allocated until then.
+        self.logged_evals = None
+        self.logged_stdout = None
+        self._unmatched_stdout = None
+        self.skipped_parts = ()
 
         self._runstate = None
+        self._partfilename = None
+        self._suppressed_stdout = None
 
         self.module = None
-        self.globs = {}
+        self._globs = None
+        # Set by a collector to let examples of a module share a namespace
+        self.shared_namespace = None
         # Hint at what is running this doctest
         self.mode = mode
 
+    @property
+    def config(self):
+        """
+        The configuration for this example. Examples share a default config
+        until this is accessed or assigned.
+        """
+        if self._config is None:
+            self._config = Config()
+        return self._config
+
+    @config.setter
+    def config(self, config):
+        self._config = config
+
+    def _getconfig(self, key, given=None):
+        """ reads a config value without allocating a private config """
+        config = _DEFAULT_CONFIG if self._config is None else self._config
+        return config.getvalue(key, given)
+
+    @property
+    def globs(self):
+        """ the namespace the example is executed in """
+        if self._globs is None:
+            self._globs = {}
+        return self._globs
+
+    @globs.setter
+    def globs(self, globs):
+        self._globs = globs
+
     def __nice__(self):
         parts = []
         parts.append(self.modname)
@@ -203,9 +314,9 @@ class DocTest(object):
                      offset_linenos=None, prefix=True):
         """ used by format_src """
         self._parse()
-        colored = self.config.getvalue('colored', colored)
-        partnos = self.config.getvalue('partnos')
-        offset_linenos = self.config.getvalue('offset_linenos', offset_linenos)
+        colored = self._getconfig('colored', colored)
+        partnos = self._getconfig('partnos')
+        offset_linenos = self._getconfig('offset_linenos', offset_linenos)
 
         n_digits = None
         startline = 1
@@ -329,9 +440,83 @@ class DocTest(object):
                 compileflags |= feature.compiler_flag
         return compileflags
 
-    def _test_globals(self):
+    def _uses_shared_namespace(self, runstate=None):
+        """
+        An example uses the shared namespace of its module if the
+        SHARED_NAMESPACE directive is enabled by default or by a block
+        directive in its first part.
+        """
+        if self.shared_namespace is None:
+            return False
+        self._parse()
+        if not self._parts:
+            return False
+        if runstate is None:
+            runstate = directive.RuntimeState.from_config(
+                self._getconfig('default_runtime_state'),
+                self._getconfig('reportchoice'))
+        enabled = runstate['SHARED_NAMESPACE']
+        for directive_ in self._parts[0].directives:
+            if directive_.name == 'SHARED_NAMESPACE' and not directive_.inline:
+                enabled = directive_.positive
+        return enabled
+
+    def is_async(self):
+        """
+        True if any part of this example uses top-level await.
+
+        Example:
+            >>> from xdoctest import doctest_example
+            >>> assert doctest_example.DocTest('>>> await foo()').is_async()
+            >>> assert not doctest_example.DocTest('>>> foo()').is_async()
+        """
+        self._parse()
+        if not utils.TOP_LEVEL_AWAIT_FLAG:  # nocover
+            return False
+        for part in self._parts:
+            mode = 'eval' if part.use_eval else 'exec'
+            try:
+                code = compile(part.source, '<doctest>', mode,
+                               flags=utils.TOP_LEVEL_AWAIT_FLAG,
+                               dont_inherit=True)
+            except SyntaxError:
+                continue
+            if utils.is_coroutine_code(code):
+                return True
+        return False
+
+    @property
+    def timeout(self):
+        r"""
+        The time limit of this example in seconds (or None). A `+TIMEOUT(n)`
+        directive anywhere in the example overrides the configured limit and
+        `-TIMEOUT` removes it.
+
+        Example:
+            >>> from xdoctest import doctest_example
+            >>> self = doctest_example.DocTest(
+            >>>     '>>> # xdoctest: +TIMEOUT(2.5)\n>>> x = 1')
+            >>> self.timeout
+            2.5
+        """
+        self._parse()
+        timeout = self._getconfig('timeout')
+        for part in self._parts:
+            for directive_ in part.directives:
+                if directive_.name == 'TIMEOUT':
+                    if not directive_.positive:
+                        timeout = None
+                    elif directive_.args:
+                        timeout = float(directive_.args[0])
+        return timeout
+
+    def _test_globals(self, shared=None):
         test_globals = self.globs
-        if self.module is None:
+        if shared is not None and shared.snapshot is not None:
+            # The snapshot already contains the module namespace
+            test_globals = self._globs = shared.clone(test_globals)
+            compileflags = self._extract_future_flags(test_globals)
+        elif self.module is None:
             compileflags = 0
         else:
             test_globals.update(self.module.__dict__)
@@ -339,49 +524,263 @@ class DocTest(object):
         # force print function and division futures
         compileflags |= __future__.print_function.compiler_flag
         compileflags |= __future__.division.compiler_flag
+        # allow top-level await (ignored by code that does not use it)
+        compileflags |= utils.TOP_LEVEL_AWAIT_FLAG
         return test_globals, compileflags
 
+    def _ran_code(self):
+        """
+        True if a part with code (not only comments and directives) ran
+        """
+        if not self.anything_ran():
+            return False
+        if len(self.skipped_parts) >= len(self._parts):
+            return False
+        skipped = set(map(id, self.skipped_parts))
+        for part in self._parts:
+            if id(part) in skipped:
+                continue
+            for line in part.source.splitlines():
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    return True
+        return False
+
     def anything_ran(self):
         # If everything was skipped, then there will be no stdout
-        return len(self.logged_stdout) > 0
+        return bool(self.logged_stdout)
+
+    def release(self):
+        """
+        Frees the execution state of a passed example once its result has been
+        reported. This drops the namespace the example ran in (which holds
+        every object the doctest created), the logged outputs, and the module
+        reference. The status of the run (e.g. `exc_info`, `skipped_parts`,
+        and `warn_list`) is retained.
+
+        Failed examples keep everything because it is needed to report the
+        failure, so this is a noop if the example failed.
+
+        Example:
+            >>> from xdoctest import doctest_example
+            >>> self = doctest_example.DocTest('>>> x = list(range(10))')
+            >>> summary = self.run(verbose=0)
+            >>> assert 'x' in self.globs
+            >>> self.release()
+            >>> assert 'x' not in self.globs
+            >>> assert summary['passed'] and self.exc_info is None
+        """
+        if self.exc_info is not None:
+            return
+        self._globs = None
+        self.module = None
+        self.logged_evals = None
+        self.logged_stdout = None
+        self._unmatched_stdout = None
+
+    def run_forked(self, verbose=None):
+        r"""
+        Executes the doctest in a child process forked from this one.
+
+        The module under test is imported before forking, so the child starts
+        with it already loaded (sharing memory copy-on-write) and nothing the
+        doctest does to global state can leak into later doctests. The child
+        sends the outcome back over a pipe: its output, warnings, skipped
+        parts, and (on failure) the rendered failure report.
+
+        Only available on platforms that support `os.fork`. Examples that
+        use the shared namespace of their module (see SHARED_NAMESPACE) cannot
+        be forked, because the names they define would only exist in the
+        child.
+
+        Example:
+            >>> # xdoctest: +REQUIRES(POSIX)
+            >>> from xdoctest import doctest_example
+            >>> import sys
+            >>> self = doctest_example.DocTest(
+            >>>     '>>> import sys\n>>> sys.leaked_by_doctest = 1')
+            >>> summary = self.run_forked(verbose=0)
+            >>> assert summary['passed']
+            >>> assert not hasattr(sys, 'leaked_by_doctest')
+        """
+        import os
+        import pickle
+        import select
+        import signal
+        verbose = self._getconfig('verbose', verbose)
+        self._parse()
+        if self._uses_shared_namespace():
+            raise ValueError('examples using SHARED_NAMESPACE cannot be forked')
+        self._import_module()
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:  # nocover
+            # In the child: run, report back, and exit without cleanup
+            os.close(read_fd)
+            try:
+                data = pickle.dumps(self._forked_child_result(verbose),
+                                    protocol=2)
+            except BaseException:
+                data = pickle.dumps({'crashed': traceback.format_exc()},
+                                    protocol=2)
+            with os.fdopen(write_fd, 'wb') as file:
+                file.write(data)
+            os._exit(0)
+
+        os.close(write_fd)
+        # The child enforces the time limit itself, this is a backstop for
+        # code that does not return control to python.
+        timeout = self.timeout
+        wait = None if timeout is None else timeout + 10
+        killed = False
+        chunks = []
+        with os.fdopen(read_fd, 'rb') as file:
+            while True:
+                ready, _, _ = select.select([file], [], [], wait)
+                if not ready:
+                    os.kill(pid, signal.SIGKILL)
+                    killed = True
+                    break
+                chunk = os.read(file.fileno(), 65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        _, status = os.waitpid(pid, 0)
+        data = b''.join(chunks)
+        if killed:
+            result = {'crashed': 'child process killed after exceeding the '
+                                 'time limit of {} seconds'.format(timeout),
+                      'limit_summary': {'timeout': True, 'stdout': ''}}
+        else:
+            try:
+                result = pickle.loads(data)
+            except (EOFError, pickle.UnpicklingError):
+                # The child died before it finished sending its result
+                result = {'crashed': 'child process exited with status '
+                                     '{}'.format(status)}
+        return self._load_forked_result(result)
+
+    def _forked_child_result(self, verbose):
+        """ runs the doctest and builds a picklable description of it """
+        import pickle
+        self._in_forked_child = True
+        with utils.CaptureStdout(supress=True) as cap:
+            summary = self.run(verbose=verbose, on_error='return')
+        warns = []
+        for warn in self.warn_list or []:
+            category = warn.category
+            try:
+                pickle.dumps(category, protocol=2)
+            except Exception:
+                category = UserWarning
+            warns.append((six.text_type(warn.message), category,
+                          warn.filename, warn.lineno))
+        result = {
+            'passed': summary['passed'],
+            'limit_summary': self._limit_summary(),
+            'stdout': cap.text,
+            'warnings': warns,
+            'skipped': [part.partno for part in self.skipped_parts],
+            'logged_stdout': list((self.logged_stdout or {}).items()),
+        }
+        if not summary['passed']:
+            exc_value = self.exc_info[1]
+            try:
+                pickle.loads(pickle.dumps(exc_value, protocol=2))
+            except Exception:
+                exc_value = None
+            result['exc_value'] = exc_value
+            result['failure_lines'] = self.repr_failure()
+        return result
+
+    def _load_forked_result(self, result):
+        """ updates this example with a result sent by a forked child """
+        if 'crashed' in result:
+            result = {
+                'passed': False, 'stdout': '', 'warnings': [], 'skipped': [],
+                'logged_stdout': [], 'exc_value': None,
+                'limit_summary': result.get('limit_summary', {}),
+                'failure_lines': [self.block_prefix + ' CRASHED',
+                                  result['crashed']],
+            }
+        if result['stdout']:
+            sys.stdout.write(result['stdout'])
+        self.warn_list = [warnings.WarningMessage(*args)
+                          for args in result['warnings']]
+        self.skipped_parts = [self._parts[partno]
+                              for partno in result['skipped']]
+        self.logged_stdout = OrderedDict(result['logged_stdout'])
+        summary = {'passed': result['passed']}
+        summary.update(result['limit_summary'])
+        if result['passed']:
+            self.exc_info = None
+            self._failure_lines = None
+        else:
+            exc_value = result['exc_value']
+            if exc_value is None:
+                exc_value = RuntimeError('doctest failed in a forked process')
+            self.exc_info = (type(exc_value), exc_value, None)
+            self._failure_lines = result['failure_lines']
+            summary['exc_info'] = self.exc_info
+        return summary
+
+    def _memory_limit(self):
+        """
+        The memory limit is process wide and cannot be safely restored, so it
+        is only enforced in a forked child (see run_forked).
+        """
+        max_memory = self._getconfig('max_memory')
+        if max_memory and not self._in_forked_child:
+            warnings.warn('max_memory is only enforced when doctests run in '
+                          'a forked process, ignoring it')
+            max_memory = None
+        return max_memory
 
     def run(self, verbose=None, on_error=None):
         """
         Executes the doctest, checks the results, reports the outcome.
         """
-        on_error = self.config.getvalue('on_error', on_error)
-        verbose = self.config.getvalue('verbose', verbose)
+        on_error = self._getconfig('on_error', on_error)
+        verbose = self._getconfig('verbose', verbose)
         if on_error not in {'raise', 'return'}:
             raise KeyError(on_error)
+        self._failure_lines = None
 
         self._parse()  # parse out parts if we have not already done so
         self.pre_run(verbose)
         self._import_module()
 
+        # Initialize a new runtime state (cloned from the configured default)
+        runstate = self._runstate = directive.RuntimeState.from_config(
+            self._getconfig('default_runtime_state'),
+            self._getconfig('reportchoice'))
+
         # Prepare for actual test run
-        test_globals, compileflags = self._test_globals()
+        shared = None
+        if self._uses_shared_namespace(runstate):
+            shared = self.shared_namespace
+        test_globals, compileflags = self._test_globals(shared)
 
-        self.logged_evals.clear()
-        self.logged_stdout.clear()
+        self.logged_evals = OrderedDict()
+        self.logged_stdout = OrderedDict()
         self._unmatched_stdout = []
 
         self.skipped_parts = []
         self.exc_info = None
         self._suppressed_stdout = verbose <= 1
 
-        # Initialize a new runtime state
-        default_state = self.config['default_runtime_state']
-        runstate = self._runstate = directive.RuntimeState(default_state)
-        # setup reporting choice
-        runstate.set_report_style(self.config['reportchoice'])
-
         # Can't do this because we can't force execution of SCRIPTS
         # if self.is_disabled():
         #     runstate['SKIP'] = True
 
         # Use the same capture object for all parts in the test
-        cap = utils.CaptureStdout(supress=self._suppressed_stdout)
-        with warnings.catch_warnings(record=True) as self.warn_list:
+        cap = utils.CaptureStdout(supress=self._suppressed_stdout,
+                                  max_chars=self._getconfig('max_output'))
+        limits = utils.ResourceLimits(self.timeout, self._memory_limit())
+        with utils.CaptureWarnings() as self.warn_list:
             for partx, part in enumerate(self._parts):
                 # Extract directives and and update runtime state
                 runstate.update(part.directives)
@@ -420,12 +819,19 @@ class DocTest(object):
                         # NOTE: For code passed to eval or exec, there is no
                         # difference between locals and globals. Only pass in
                         # one dict, otherwise there is weird behavior
-                        with cap:
+                        with cap, limits:
                             # We can execute each part using exec or eval.  If
                             # a doctest part is flagged as `use_eval` we
                             # exepect it to return an object with a repr that
                             # can compared to a "want" statement.
-                            if part.use_eval:
+                            if utils.is_coroutine_code(code):
+                                # Parts with top-level await evaluate to a
+                                # coroutine that runs on the shared loop.
+                                result = utils.run_awaitable(
+                                    eval(code, test_globals))
+                                if part.use_eval:
+                                    got_eval = result
+                            elif part.use_eval:
                                 got_eval = eval(code, test_globals)
                             else:
                                 exec(code, test_globals)
@@ -475,7 +881,7 @@ class DocTest(object):
                     if on_error == 'raise':
                         raise
                     break
-                except Exception:
+                except (Exception, utils.TimeLimitExceeded):
                     ex_type, ex_value, tb = sys.exc_info()
                     # The idea of CLEAN_TRACEBACK is to make it so the
                     # traceback from this function doesn't clutter the error
@@ -509,6 +915,13 @@ class DocTest(object):
 
         if self.exc_info is None:
             self.failed_part = None
+            if (shared is not None and shared.snapshot is None and
+                    self._ran_code()):
+                # The first passing example that ran code is the setup for
+                # the others. Its getfixture is bound to its own test and is
+                # not shared.
+                shared.snapshot = dict(test_globals)
+                shared.snapshot.pop('getfixture', None)
 
         if len(self.skipped_parts) == len(self._parts):
             # we skipped everything
@@ -523,6 +936,11 @@ class DocTest(object):
         if self.mode == 'pytest':
             return 'pytest ' + self.node
         elif self.mode == 'native':
+            if self.modname.startswith('<') and self.fpath is not None:
+                # a documentation file, which can be run on its own
+                from os.path import basename
+                return 'python -m xdoctest --docs {} {}:{}'.format(
+                    self.fpath, basename(self.fpath), self.num)
             in_path = static.is_modname_importable(self.modname)
             if in_path:
                 # should be able to find the module by name
@@ -537,21 +955,29 @@ class DocTest(object):
     def block_prefix(self):
         return 'ZERO-ARG' if self.block_type == 'zero-arg' else 'DOCTEST'
 
+    def _stdout_colored(self):
+        """
+        Colors are only worth computing when stdout is a terminal. When the
+        output is captured or redirected the highlighting is skipped.
+        """
+        return bool(self._getconfig('colored')) and _stdout_isatty()
+
     def pre_run(self, verbose):
         if verbose >= 1:
+            colored = self._stdout_colored()
             if verbose >= 2:
-                barrier = self._color('====== <exec> ======', 'white')
+                barrier = self._color('====== <exec> ======', 'white', colored)
                 print(barrier)
             if self.block_type == 'zero-arg':
                 # zero-arg funcs arent doctests, but we can still run them
                 print('* ZERO-ARG FUNC : {}'.format(self.node))
             else:
-                print('* DOCTEST : {}, line {}'.format(self.node, self.lineno) + self._color(' <- wrt source file', 'white'))
+                print('* DOCTEST : {}, line {}'.format(self.node, self.lineno) + self._color(' <- wrt source file', 'white', colored))
             if verbose >= 3:
-                print(self._color(self.block_prefix + ' SOURCE', 'white'))
-                print(self.format_src())
+                print(self._color(self.block_prefix + ' SOURCE', 'white', colored))
+                print(self.format_src(colored=colored))
                 # print(self._color('* ----------', 'white'))
-                print(self._color(self.block_prefix + ' STDOUT/STDERR', 'white'))
+                print(self._color(self.block_prefix + ' STDOUT/STDERR', 'white', colored))
 
     def failed_line_offset(self):
         """
@@ -633,6 +1059,9 @@ class DocTest(object):
             >>> summary = self.run(on_error='return', verbose=0)
             >>> print('[res]' + '\n[res]'.join(self.repr_failure()))
         """
+        if self._failure_lines is not None:
+            # The example ran in another process which reported its failure
+            return list(self._failure_lines)
         #     '=== LINES ===',
         # ]
 
@@ -692,7 +1121,7 @@ class DocTest(object):
             self._color(' <- wrt doctest', 'red'),
         ]
 
-        colored = self.config['colored']
+        colored = self._getconfig('colored')
         if fail_lineno is not None:
             fpath = '<file?>' if self.fpath is None else self.fpath
             lines += ['  File "{}", line {},'.format(fpath, fail_lineno) +
@@ -849,30 +1278,49 @@ class DocTest(object):
 
     def _color(self, text, color, enabled=None):
         """ conditionally color text based on config and flags """
-        colored = self.config.getvalue('colored', enabled)
+        colored = self._getconfig('colored', enabled)
         if colored:
             text = utils.color_text(text, color)
         return text
 
+    def _limit_summary(self):
+        """
+        Summary entries for an example stopped by a time or memory limit. The
+        output the example produced before it was stopped is included.
+        """
+        if self.exc_info is None:
+            return {}
+        if issubclass(self.exc_info[0], utils.TimeLimitExceeded):
+            key = 'timeout'
+        elif (issubclass(self.exc_info[0], MemoryError) and
+              self._in_forked_child and self._getconfig('max_memory')):
+            key = 'memory_limit'
+        else:
+            return {}
+        stdout = ''.join(v for v in (self.logged_stdout or {}).values() if v)
+        return {key: True, 'stdout': stdout}
+
     def post_run(self, verbose):
         # print('POST RUN verbose = {!r}'.format(verbose))
         summary = {
             'passed': self.exc_info is None
         }
+        summary.update(self._limit_summary())
+        colored = self._stdout_colored() if verbose >= 1 else False
         if verbose >= 1:
-            print(self._color(self.block_prefix + ' RESULT', 'white'))
+            print(self._color(self.block_prefix + ' RESULT', 'white', colored))
         if self.exc_info is None:
             if verbose >= 1:
                 if self._suppressed_stdout:
                     self._print_captured()
                 if len(self.skipped_parts) == len(self._parts):
-                    success = self._color('SKIPPED', 'yellow')
+                    success = self._color('SKIPPED', 'yellow', colored)
                 else:
-                    success = self._color('SUCCESS', 'green')
+                    success = self._color('SUCCESS', 'green', colored)
                 print('* {}: {}'.format(success, self.node))
         else:
             if verbose >= 1:
-                failure = self._color('FAILURE', 'red')
+                failure = self._color('FAILURE', 'red', colored)
                 print('* {}: {}'.format(failure, self.node))
 
                 if verbose >= 2:
@@ -881,11 +1329,21 @@ class DocTest(object):
                     print(text)
             summary['exc_info'] = self.exc_info
         if verbose >= 2:
-            barrier = self._color('====== </exec> ======', 'white')
+            barrier = self._color('====== </exec> ======', 'white', colored)
             print(barrier)
         return summary
 
 
+def _stdout_isatty():
+    """ True if the current sys.stdout writes to a terminal """
+    isatty = getattr(sys.stdout, 'isatty', None)
+    try:
+        return bool(isatty is not None and isatty())
+    except ValueError:  # nocover
+        # I/O operation on a closed file
+        return False
+
+
 if __name__ == '__main__':
     r"""
     CommandLine:
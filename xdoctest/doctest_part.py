@@ -52,11 +52,19 @@ def add_line_numbers(source, start=1, n_digits=None):
 setattr(utils, 'add_line_numbers', add_line_numbers)
 
 
+def _split_lines(text, n_lines):
+    """ inverse of joining a list of `n_lines` lines with newlines """
+    return text.split('\n') if n_lines else []
+
+
 class DoctestPart(object):
     """
     The result of parsing that represents a "logical block" of code.
     If a want statment is defined, it is stored here.
 
+    To keep large collections of parts compact, lines are not stored as lists.
+    Each group of lines is joined into a single string and split on demand.
+
     Attributes:
         exec_lines (list): executable lines in this part
         want_lines (list): lines that the result of the execution should match
@@ -64,13 +72,26 @@ class DoctestPart(object):
         orig_lines (list): the original text parsed into exec and want
         _directives (list): directives that this part will apply before being run
         partno (int): identifies the part number in the larger example
+
+    Example:
+        >>> self = DoctestPart(['x = 1', 'y = 2'], ['3'], orig_lines=[
+        >>>     '>>> x = 1', '>>> y = 2'])
+        >>> assert self.exec_lines == ['x = 1', 'y = 2']
+        >>> assert self.orig_lines == ['>>> x = 1', '>>> y = 2']
+        >>> assert self.want_lines == ['3']
+        >>> assert self.n_lines == 3
     """
+    __slots__ = ('_source', '_want', '_orig', 'n_exec_lines', 'n_want_lines',
+                 'line_offset', 'use_eval', '_directives', 'partno')
+
     def __init__(self, exec_lines, want_lines=None, line_offset=0,
                  orig_lines=None, directives=None, partno=None):
-        self.exec_lines = exec_lines
-        self.want_lines = want_lines
+        self.n_exec_lines = len(exec_lines) if exec_lines else 0
+        self.n_want_lines = len(want_lines) if want_lines else 0
+        self._source = '\n'.join(exec_lines) if exec_lines else ''
+        self._want = '\n'.join(want_lines) if want_lines else None
+        self._orig = None if orig_lines is None else '\n'.join(orig_lines)
         self.line_offset = line_offset
-        self.orig_lines = orig_lines
         self.use_eval = False
         self._directives = directives
         self.partno = partno
@@ -80,19 +101,24 @@ class DoctestPart(object):
         return self.n_exec_lines + self.n_want_lines
 
     @property
-    def n_exec_lines(self):
-        return len(self.exec_lines)
+    def exec_lines(self):
+        return _split_lines(self._source, self.n_exec_lines)
 
     @property
-    def n_want_lines(self):
-        if self.want_lines:
-            return len(self.want_lines)
-        else:
-            return 0
+    def orig_lines(self):
+        if self._orig is None:
+            return None
+        return _split_lines(self._orig, self.n_exec_lines)
+
+    @property
+    def want_lines(self):
+        if self._want is None:
+            return None
+        return _split_lines(self._want, self.n_want_lines)
 
     @property
     def source(self):
-        return '\n'.join(self.exec_lines)
+        return self._source
 
     @property
     def directives(self):
@@ -111,17 +137,10 @@ class DoctestPart(object):
 
     @property
     def want(self):
-        # options = self._find_options(source, name, lineno + s1)
-        # example = DoctestPart(source, None, None, lineno=lineno + s1,
-        #                       indent=indent, options=options)
-        # the last part has a want
         # todo: If `want` contains a traceback message, then extract it.
         # m = _EXCEPTION_RE.match(want)
         # exc_msg = m.group('msg') if m else None
-        if self.want_lines:
-            return '\n'.join(self.want_lines)
-        else:
-            return None
+        return self._want
 
     def __nice__(self):
         parts = []
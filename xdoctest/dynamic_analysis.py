@@ -2,17 +2,41 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 import inspect
 import os
+import sys
 import types
 import six
 
+#: Directory where `parse_dynamic_calldefs` stores its results between
+#: sessions. Set from the XDOCTEST_CACHE_DIR environment variable or by the
+#: pytest plugin; None only caches results in memory.
+CACHE_DPATH = os.environ.get('XDOCTEST_CACHE_DIR', None)
 
-def parse_dynamic_calldefs(modpath=None):
+# Maps the cache key of a module file to its calldefs
+_CALLDEF_CACHE = {}
+
+_CALLDEF_FIELDS = ('callname', 'lineno', 'docstr', 'doclineno',
+                   'doclineno_end')
+
+#: Seconds an isolated import (see `iter_isolated_calldefs`) may take
+ISOLATED_TIMEOUT = float(os.environ.get('XDOCTEST_IMPORT_TIMEOUT', 300))
+
+
+def parse_dynamic_calldefs(modpath=None, use_cache=True):
     """
     Dynamic parsing of module doctestable items.
 
     While this does execute module code it is needed for testing extension
     libraries.
 
+    A module that is already imported is reused instead of being imported
+    again. The results are cached by the path, modification time, and size
+    of the module file (and in `CACHE_DPATH` across sessions), so unchanged
+    modules are only introspected once.
+
+    Args:
+        modpath (str): path to the module
+        use_cache (bool): if False, always introspect the module
+
     CommandLine:
         python -m xdoctest.dynamic_analysis parse_dynamic_calldefs
 
@@ -28,10 +52,42 @@ def parse_dynamic_calldefs(modpath=None):
         ...     else:
         ...         print(' * len(calldef.docstr) = {}'.format(len(calldef.docstr)))
     """
+    key = None
+    if use_cache:
+        key = _calldef_cache_key(modpath)
+        calldefs = _load_cached_calldefs(key)
+        if calldefs is not None:
+            return calldefs
+    module = _reuse_or_import(modpath)
+    calldefs = _introspect_calldefs(module)
+    if use_cache:
+        _store_cached_calldefs(key, calldefs)
+    return calldefs
+
+
+def _reuse_or_import(modpath):
+    """
+    Returns the module at `modpath`, which is only imported if no module
+    loaded from that file is in `sys.modules`.
+    """
+    from xdoctest import static_analysis as static
+    from xdoctest import utils
+    modname = static.modpath_to_modname(modpath)
+    module = sys.modules.get(modname, None)
+    mod_fpath = getattr(module, '__file__', None)
+    if mod_fpath is not None:
+        if mod_fpath.endswith('.pyc'):
+            mod_fpath = mod_fpath[:-1]
+        if os.path.realpath(mod_fpath) == os.path.realpath(modpath):
+            return module
+    return utils.import_module_from_path(modpath)
+
+
+def _introspect_calldefs(module):
+    """
+    Builds the calldefs of the doctestable items of a live module
+    """
     from xdoctest import static_analysis as static
-    from xdoctest import utils  # NOQA
-    # Possible option for dynamic parsing
-    module = utils.import_module_from_path(modpath)
     calldefs = {}
 
     if getattr(module, '__doc__'):
@@ -58,6 +114,212 @@ def parse_dynamic_calldefs(modpath=None):
     return calldefs
 
 
+def iter_isolated_calldefs(modpaths, jobs=None, timeout=None):
+    """
+    Dynamically parses modules in a pool of subprocesses.
+
+    Each module is imported by a fresh python process, which sends back its
+    calldefs as plain data. Up to `jobs` modules are imported at once and
+    results that are already cached are reused. A module that fails to
+    import, crashes the interpreter, or exceeds the timeout results in an
+    ImportError instead of stopping the caller.
+
+    Args:
+        modpaths (List[str]): paths to the modules
+        jobs (int): number of concurrent subprocesses, defaults to the
+            number of CPUs
+        timeout (float): maximum number of seconds for each import,
+            defaults to `ISOLATED_TIMEOUT`
+
+    Yields:
+        Tuple[str, dict, Exception]: each modpath in the given order with its
+            calldefs and None, or with None and the error
+
+    Example:
+        >>> import _ctypes
+        >>> results = list(iter_isolated_calldefs([_ctypes.__file__]))
+        >>> modpath, calldefs, error = results[0]
+        >>> assert error is None
+        >>> assert calldefs['Array'].docstr == _ctypes.Array.__doc__
+    """
+    modpaths = list(modpaths)
+    if not modpaths:
+        return
+    if six.PY2:  # nocover
+        # There is no timeout for subprocesses, so parse in this process
+        for modpath in modpaths:
+            try:
+                yield modpath, parse_dynamic_calldefs(modpath), None
+            except ImportError as ex:
+                yield modpath, None, ex
+        return
+    from concurrent.futures import ThreadPoolExecutor
+    if timeout is None:
+        timeout = ISOLATED_TIMEOUT
+    if jobs is None:
+        import multiprocessing
+        jobs = multiprocessing.cpu_count()
+
+    def _parse(modpath):
+        key = _calldef_cache_key(modpath)
+        calldefs = _load_cached_calldefs(key)
+        if calldefs is None:
+            try:
+                calldefs = _isolated_calldefs(modpath, timeout)
+            except ImportError as ex:
+                return None, ex
+            _store_cached_calldefs(key, calldefs)
+        return calldefs, None
+
+    n_workers = max(1, min(jobs, len(modpaths)))
+    with ThreadPoolExecutor(n_workers) as pool:
+        futures = [pool.submit(_parse, modpath) for modpath in modpaths]
+        for modpath, future in zip(modpaths, futures):
+            calldefs, error = future.result()
+            yield modpath, calldefs, error
+
+
+def _isolated_calldefs(modpath, timeout):
+    """
+    Runs `_isolated_main` in a subprocess to parse one module
+    """
+    import io
+    import json
+    import subprocess
+    import tempfile
+    fd, out_fpath = tempfile.mkstemp(prefix='xdoctest_', suffix='.json')
+    os.close(fd)
+    request = json.dumps({'modpath': modpath, 'sys_path': sys.path,
+                          'out_fpath': out_fpath})
+    # Make sure the child can import this copy of xdoctest
+    env = os.environ.copy()
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    paths = [root]
+    if env.get('PYTHONPATH'):
+        paths.append(env['PYTHONPATH'])
+    env['PYTHONPATH'] = os.pathsep.join(paths)
+    code = ('from xdoctest.dynamic_analysis import _isolated_main; '
+            '_isolated_main()')
+    try:
+        proc = subprocess.Popen([sys.executable, '-c', code],
+                                stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, env=env)
+        try:
+            _, err = proc.communicate(request.encode('utf8'), timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            raise ImportError('import took longer than {} seconds'.format(
+                timeout))
+        if proc.returncode < 0:
+            raise ImportError('import crashed the interpreter '
+                              '(signal {})'.format(-proc.returncode))
+        if proc.returncode != 0:
+            lines = err.decode('utf8', 'replace').strip().splitlines()
+            raise ImportError(lines[-1] if lines else 'import failed')
+        try:
+            with io.open(out_fpath, 'r', encoding='utf8') as file:
+                data = json.load(file)
+        except (IOError, OSError, ValueError):
+            # e.g. the module called sys.exit(0) while it was imported
+            raise ImportError('import produced no result')
+    finally:
+        os.remove(out_fpath)
+    return _calldefs_from_json(data)
+
+
+def _isolated_main():
+    """
+    Entry point of the subprocesses started by `iter_isolated_calldefs`.
+    Reads a request from stdin and writes the calldefs as json to a file.
+    """
+    import io
+    import json
+    request = json.loads(sys.stdin.read())
+    sys.path[:] = request['sys_path']
+    calldefs = _introspect_calldefs(_reuse_or_import(request['modpath']))
+    for calldef in calldefs.values():
+        # Only docstrings can be sent back
+        if not isinstance(calldef.docstr, six.string_types):
+            calldef.docstr = None
+    text = json.dumps(_calldefs_to_json(calldefs))
+    with io.open(request['out_fpath'], 'w', encoding='utf8') as file:
+        file.write(six.text_type(text))
+
+
+def _calldef_cache_key(modpath):
+    stat = os.stat(modpath)
+    return (os.path.realpath(modpath), stat.st_mtime, stat.st_size,
+            sys.version)
+
+
+def _cache_fpath(key):
+    import hashlib
+    hashid = hashlib.sha1(repr(key).encode('utf8')).hexdigest()
+    return os.path.join(CACHE_DPATH, 'calldefs_' + hashid + '.json')
+
+
+def _load_cached_calldefs(key):
+    """
+    Returns the cached calldefs of a module or None on a cache miss
+    """
+    try:
+        return _CALLDEF_CACHE[key]
+    except KeyError:
+        pass
+    if not CACHE_DPATH:
+        return None
+    import json
+    try:
+        with open(_cache_fpath(key), 'r') as file:
+            data = json.load(file)
+    except (IOError, OSError, ValueError):
+        return None
+    if data.get('key') != list(key):
+        return None
+    calldefs = _calldefs_from_json(data['calldefs'])
+    _CALLDEF_CACHE[key] = calldefs
+    return calldefs
+
+
+def _store_cached_calldefs(key, calldefs):
+    _CALLDEF_CACHE[key] = calldefs
+    if not CACHE_DPATH:
+        return
+    if not all(isinstance(calldef.docstr, (six.string_types, type(None)))
+               for calldef in calldefs.values()):
+        # e.g. a __doc__ that is a descriptor can only be cached in memory
+        return
+    import json
+    import tempfile
+    data = {'key': list(key), 'calldefs': _calldefs_to_json(calldefs)}
+    try:
+        if not os.path.exists(CACHE_DPATH):
+            os.makedirs(CACHE_DPATH)
+        # Write to a temporary file first so readers never see partial data
+        fd, tmp_fpath = tempfile.mkstemp(dir=CACHE_DPATH, suffix='.tmp')
+        with os.fdopen(fd, 'w') as file:
+            json.dump(data, file)
+        if six.PY2:  # nocover
+            os.rename(tmp_fpath, _cache_fpath(key))
+        else:
+            os.replace(tmp_fpath, _cache_fpath(key))
+    except (IOError, OSError):  # nocover
+        pass
+
+
+def _calldefs_to_json(calldefs):
+    return {key: {field: getattr(calldef, field)
+                  for field in _CALLDEF_FIELDS}
+            for key, calldef in calldefs.items()}
+
+
+def _calldefs_from_json(data):
+    from xdoctest import static_analysis as static
+    return {key: static.CallDefNode(args=None, **fields)
+            for key, fields in data.items()}
+
+
 def get_stack_frame(n=0, strict=True):
     """
     Gets the current stack frame or any of its ancestors dynamically
@@ -156,8 +418,23 @@ def iter_module_doctestables(module):
     else:
         valid_class_types = six.class_types
 
+    # Maps the id of each visited item to whether the module defines it.
+    # Items defined with the module's name and methods of classes already
+    # known to belong to the module skip the full check.
+    target_modname = module.__name__
+    owned = {}
+
     def _recurse(item, module):
-        return is_defined_by_module(item, module)
+        flag = owned.get(id(item), None)
+        if flag is None:
+            if getattr(item, '__module__', None) == target_modname:
+                flag = True
+            elif owned.get(id(getattr(item, '__objclass__', None)), False):
+                flag = True
+            else:
+                flag = is_defined_by_module(item, module)
+            owned[id(item)] = flag
+        return flag
 
     #modpath = static.modpath_to_modname(module.__file__)
     for key, val in module.__dict__.items():
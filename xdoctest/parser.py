@@ -40,6 +40,11 @@ GotWantException = checker.GotWantException
 
 INDENT_RE = re.compile('^([ ]*)(?=\S)', re.MULTILINE)
 
+# Python issue 16806 gave multiline strings the line number they end on. It
+# was fixed in Python 3.8, which also added end line numbers to ast nodes.
+NEED_16806_WORKAROUND = sys.version_info[0:2] < (3, 8)
+_HAS_END_LINENO = sys.version_info[0:2] >= (3, 8)
+
 
 class DoctestParser(object):
     r"""
@@ -140,11 +145,16 @@ class DoctestParser(object):
         return all_parts
 
     def _package_groups(self, grouped_lines):
+        # Locate the statements of all source chunks with a single parse
+        source_chunks = [_strip_chunk_indent(chunk[0])[1]
+                         for chunk in grouped_lines if isinstance(chunk, tuple)]
+        located = iter(self._locate_all_ps1_linenos(source_chunks))
         lineno = 0
         for chunk in grouped_lines:
             if isinstance(chunk, tuple):
                 slines, wlines = chunk
-                for example in self._package_chunk(slines, wlines, lineno):
+                for example in self._package_chunk(slines, wlines, lineno,
+                                                   next(located)):
                     yield example
                 lineno += len(slines) + len(wlines)
             else:
@@ -152,12 +162,17 @@ class DoctestParser(object):
                 yield text_part
                 lineno += len(chunk)
 
-    def _package_chunk(self, raw_source_lines, raw_want_lines, lineno=0):
+    def _package_chunk(self, raw_source_lines, raw_want_lines, lineno=0,
+                       located=None):
         """
         if `self.simulate_repl` is True, then each statment is broken into its
         own part.  Otherwise, statements are grouped by the closest `want`
         statement.
 
+        Args:
+            located (tuple): the result of `_locate_ps1_linenos` for this
+                chunk if it is already known
+
         Example:
             >>> from xdoctest.parser import *
             >>> raw_source_lines = ['>>> "string"']
@@ -170,16 +185,15 @@ class DoctestParser(object):
             'string'
 
         """
-        match = INDENT_RE.search(raw_source_lines[0])
-        line_indent = 0 if match is None else (match.end() - match.start())
-
-        source_lines = [p[line_indent:] for p in raw_source_lines]
+        line_indent, source_lines = _strip_chunk_indent(raw_source_lines)
         want_lines = [p[line_indent:] for p in raw_want_lines]
 
         exec_source_lines = [p[4:] for p in source_lines]
 
         # Find the line number of each standalone statment
-        ps1_linenos, eval_final = self._locate_ps1_linenos(source_lines)
+        if located is None:
+            located = self._locate_ps1_linenos(source_lines)
+        ps1_linenos, eval_final = located
 
         # Find all directives here:
         # A directive necessarilly will split a doctest into multiple parts
@@ -298,14 +312,7 @@ class DoctestParser(object):
             >>> assert eval_final is True
         """
         # print('source_lines = {!r}'.format(source_lines))
-        # Strip indentation (and PS1 / PS2 from source)
-        exec_source_lines = [p[4:] for p in source_lines]
-
-        # Hack to make comments appear like executable statements
-        # note, this hack never leaves this function because we only are
-        # returning line numbers.
-        exec_source_lines = ['_._  = None' if p.startswith('#') else p
-                             for p in exec_source_lines]
+        exec_source_lines = _exec_lines(source_lines)
 
         source_block = '\n'.join(exec_source_lines)
         try:
@@ -321,12 +328,82 @@ class DoctestParser(object):
                     syn_ex.text = line  + '\n'
             raise syn_ex
 
-        statement_nodes = pt.body
-        ps1_linenos = [node.lineno - 1 for node in statement_nodes]
-        NEED_16806_WORKAROUND = True
-        if NEED_16806_WORKAROUND:  # pragma: nobranch
+        return self._ps1_linenos_from_nodes(pt.body, source_lines,
+                                            exec_source_lines)
+
+    def _locate_all_ps1_linenos(self, source_chunks):
+        """
+        Runs `_locate_ps1_linenos` on every chunk of source in a docstring,
+        but parses all of them as one module.
+
+        The chunks are joined into a single block of code and parsed once.
+        Each top-level statement is then assigned to the chunk that contains
+        its lines. If the block does not parse, or a statement spans two
+        chunks, then each chunk is parsed on its own so errors are reported
+        for the chunk that caused them.
+
+        Args:
+            source_chunks (List[List[str]]): the source lines of each chunk
+
+        Returns:
+            List[tuple]: the result of `_locate_ps1_linenos` for each chunk
+
+        Example:
+            >>> self = DoctestParser()
+            >>> source_chunks = [['>>> x = 1', '>>> x'],
+            >>>                  ['>>> def foo():', '...     return 0'],
+            >>>                  ['>>> foo()']]
+            >>> self._locate_all_ps1_linenos(source_chunks)
+            [([0, 1], True), ([0], False), ([0], True)]
+        """
+        if len(source_chunks) < 2 or not _HAS_END_LINENO:
+            return [self._locate_ps1_linenos(lines) for lines in source_chunks]
+
+        exec_chunks = [_exec_lines(lines) for lines in source_chunks]
+        source_block = '\n'.join(it.chain.from_iterable(exec_chunks))
+        try:
+            pt = ast.parse(source_block, filename='<source_block>')
+        except SyntaxError:
+            # Fallback to find the chunk with the error
+            return [self._locate_ps1_linenos(lines) for lines in source_chunks]
+
+        # Assign each statement to a chunk using the line it starts on
+        nodes = iter(pt.body)
+        node = next(nodes, None)
+        located = []
+        start = 0
+        for source_lines, exec_source_lines in zip(source_chunks, exec_chunks):
+            stop = start + len(exec_source_lines)
+            chunk_nodes = []
+            while node is not None and node.lineno <= stop:
+                # Decorators start before the line of the statement itself
+                first = min([node.lineno] + [
+                    d.lineno for d in getattr(node, 'decorator_list', [])])
+                if first <= start or node.end_lineno > stop:
+                    # A statement crosses a chunk boundary
+                    return [self._locate_ps1_linenos(lines)
+                            for lines in source_chunks]
+                chunk_nodes.append(node)
+                node = next(nodes, None)
+            # Make line numbers relative to the chunk
+            chunk_linenos = [n.lineno - 1 - start for n in chunk_nodes]
+            located.append(self._ps1_linenos_from_nodes(
+                chunk_nodes, source_lines, exec_source_lines, chunk_linenos))
+            start = stop
+        return located
+
+    def _ps1_linenos_from_nodes(self, statement_nodes, source_lines,
+                                exec_source_lines, ps1_linenos=None):
+        """
+        Finishes `_locate_ps1_linenos` given the parsed top level statements.
+        """
+        if ps1_linenos is None:
+            ps1_linenos = [node.lineno - 1 for node in statement_nodes]
+        if NEED_16806_WORKAROUND:
             ps1_linenos = self._workaround_16806(
                 ps1_linenos, exec_source_lines)
+        else:
+            ps1_linenos = set(ps1_linenos)
         # Respect any line explicitly defined as PS2 (via its prefix)
         ps2_linenos = {
             x for x, p in enumerate(source_lines) if p[:4] != '>>> '
@@ -534,6 +611,29 @@ class DoctestParser(object):
         return labeled_lines
 
 
+def _strip_chunk_indent(raw_source_lines):
+    """
+    Returns the indentation of a chunk of doctest source and its lines with
+    that indentation removed.
+    """
+    match = INDENT_RE.search(raw_source_lines[0])
+    line_indent = 0 if match is None else (match.end() - match.start())
+    source_lines = [p[line_indent:] for p in raw_source_lines]
+    return line_indent, source_lines
+
+
+def _exec_lines(source_lines):
+    """
+    Strips the PS1 / PS2 prefixes from doctest source lines.
+    """
+    exec_source_lines = [p[4:] for p in source_lines]
+    # Hack to make comments appear like executable statements
+    # note, this hack never leaves the parser because we only are
+    # returning line numbers.
+    return ['_._  = None' if p.startswith('#') else p
+            for p in exec_source_lines]
+
+
 def min_indentation(s):
     "Return the minimum indentation of any non-blank line in `s`"
     indents = [len(indent) for indent in INDENT_RE.findall(s)]
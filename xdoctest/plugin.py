@@ -32,11 +32,11 @@ def monkey_patch_disable_normal_doctest():
     to do this.
     """
     import sys
-    from _pytest import doctest
     # Only perform the monkey patch if it is clear the xdoctest plugin is
     # wanted instead of the standard _pytest.doctest pluginn
     if '--doctest-modules' not in sys.argv:
         if '--xdoctest-modules' in sys.argv or '--xdoctest' in sys.argv:
+            from _pytest import doctest
             # overwriting the collect function will cripple _pytest.doctest and
             # prevent conflicts with this module.
             def pytest_collect_file(path, parent):
@@ -50,7 +50,9 @@ monkey_patch_disable_normal_doctest()
 
 def pytest_addoption(parser):
     # TODO: make this programatically mirror the argparse in __main__
-    from xdoctest import core
+    # Note: avoid importing xdoctest.core here, it is only needed if
+    # xdoctest is actually used in this session.
+    from xdoctest import constants
 
     group = parser.getgroup('collect')
     parser.addini('xdoctest_encoding', 'encoding used for xdoctest files', default='utf-8')
@@ -72,7 +74,7 @@ def pytest_addoption(parser):
     group.addoption('--xdoctest-style', '--xdoc-style',
                     type=str.lower, default='freeform',
                     help='basic style used to write doctests',
-                    choices=core.DOCTEST_STYLES,
+                    choices=constants.DOCTEST_STYLES,
                     dest='xdoctest_style')
 
     group.addoption('--xdoctest-options', '--xdoc-options',
@@ -91,12 +93,54 @@ def pytest_addoption(parser):
                     help='Turns off ansii colors in stdout',
                     dest='xdoctest_colored')
 
+    group.addoption('--xdoctest-timeout', '--xdoc-timeout',
+                    type=float, default=None, metavar='SECONDS',
+                    help='Fail doctests that run longer than this.',
+                    dest='xdoctest_timeout')
+
+    group.addoption('--xdoctest-max-memory', '--xdoc-max-memory',
+                    type=float, default=None, metavar='MB',
+                    help=('Fail doctests that allocate more than this. '
+                          'Only enforced in forked processes, see '
+                          '"python -m xdoctest --fork".'),
+                    dest='xdoctest_max_memory')
+
+    group.addoption('--xdoctest-max-output', '--xdoc-max-output',
+                    type=int, default=None, metavar='CHARS',
+                    help='Capture at most this much stdout per doctest.',
+                    dest='xdoctest_max_output')
+
     group.addoption('--xdoctest-offset', '--xdoc-offset',
                     action='store_true', default=False,
                     help=('Doctest outputs will display line numbers '
                           'wrt to the source file.'),
                     dest='xdoctest_offset_linenos')
 
+    group.addoption('--xdoctest-profile', '--xdoc-profile',
+                    action='store_true', default=False,
+                    help='Report how often parsed docstrings were reused.',
+                    dest='xdoctest_profile')
+
+
+def pytest_configure(config):
+    # Keep dynamically parsed extension modules in the pytest cache
+    cache = getattr(config, 'cache', None)
+    if config.option.xdoctestmodules and cache is not None:
+        from xdoctest import dynamic_analysis
+        if dynamic_analysis.CACHE_DPATH is None:
+            dynamic_analysis.CACHE_DPATH = str(cache.makedir('xdoctest'))
+    # Registered here too so --strict works when pytest-xdist is absent
+    config.addinivalue_line(
+        'markers', 'xdist_group(name): run all tests of a group on the '
+        'same pytest-xdist worker (used with --dist loadgroup)')
+
+
+def pytest_terminal_summary(terminalreporter):
+    config = terminalreporter.config
+    if config.getvalue('xdoctest_profile'):
+        from xdoctest import core
+        terminalreporter.write_line(core.format_parse_memo_info())
+
 
 def pytest_collect_file(path, parent):
     config = parent.config
@@ -110,11 +154,64 @@ def pytest_collect_file(path, parent):
 def _is_xdoctest(config, path, parent):
     if path.ext in ('.txt', '.rst') and parent.session.isinitpath(path):
         return True
-    globs = config.getoption("xdoctestglob") or ['test*.txt']
+    globmatch = getattr(config, '_xdoctest_globmatch', None)
+    if globmatch is None:
+        # Built once instead of once per collected file
+        globmatch = _compile_glob_matcher(
+            config.getoption('xdoctestglob') or ['test*.txt'])
+        config._xdoctest_globmatch = globmatch
+    return globmatch(str(path))
+
+
+def _compile_glob_matcher(globs):
+    """
+    Combines multiple glob patterns into a single precompiled matcher.
+
+    Matches the semantics of `py.path.local.check(fnmatch=glob)`: patterns
+    without a path separator are matched against the basename, others are
+    matched against the full path.
+
+    Args:
+        globs (list): glob patterns
+
+    Returns:
+        callable: function that returns True if a path matches any glob
+
+    Example:
+        >>> import os
+        >>> globmatch = _compile_glob_matcher(['test*.txt', '*.foo'])
+        >>> assert globmatch(os.path.join('docs', 'test_me.txt'))
+        >>> assert globmatch('bar.foo')
+        >>> assert not globmatch(os.path.join('test_dir', 'me.txt'))
+        >>> globmatch = _compile_glob_matcher([os.path.join('docs', '*.rst')])
+        >>> assert globmatch(os.path.join('', 'root', 'docs', 'me.rst'))
+        >>> assert not globmatch('me.rst')
+    """
+    import os
+    import re
+    import fnmatch
+    from os.path import normcase, basename, isabs
+    base_pats = []
+    full_pats = []
     for glob in globs:
-        if path.check(fnmatch=glob):
+        glob = normcase(glob)
+        if os.sep not in glob:
+            base_pats.append(fnmatch.translate(glob))
+        else:
+            if not isabs(glob):
+                glob = '*' + os.sep + glob
+            full_pats.append(fnmatch.translate(glob))
+    base_regex = re.compile('|'.join(base_pats)) if base_pats else None
+    full_regex = re.compile('|'.join(full_pats)) if full_pats else None
+
+    def globmatch(path):
+        path = normcase(path)
+        if base_regex is not None and base_regex.match(basename(path)):
+            return True
+        if full_regex is not None and full_regex.match(path):
             return True
-    return False
+        return False
+    return globmatch
 
 
 class ReprFailXDoctest(code.TerminalRepr):
@@ -138,12 +235,31 @@ class XDoctestItem(pytest.Item):
 
     def setup(self):
         if self.example is not None:
-            self.fixture_request = _setup_fixtures(self)
-            globs = dict(getfixture=self.fixture_request.getfixturevalue)
-            for name, value in self.fixture_request.getfixturevalue('xdoctest_namespace').items():
+            self.funcargs = {}
+            if _module_fixtureinfo(self).names_closure:
+                # autouse fixtures must be active before the doctest runs
+                self.fixture_request = _setup_fixtures(self)
+                getfixture = self.fixture_request.getfixturevalue
+            else:
+                # Nothing to set up, only build a request if one is used
+                getfixture = self._getfixture
+            globs = dict(getfixture=getfixture)
+            for name, value in _xdoctest_namespace(self).items():
                 globs[name] = value
             self.example.globs.update(globs)
 
+    def _getfixture(self, name):
+        """ the ``getfixture`` function of doctests without autouse fixtures """
+        if self.fixture_request is None:
+            self.fixture_request = _setup_fixtures(self)
+        return self.fixture_request.getfixturevalue(name)
+
+    def teardown(self):
+        if self.example is not None:
+            # The result has been reported, drop the state of passed examples
+            self.example.release()
+        self.fixture_request = None
+
     def runtest(self):
         if self.example.is_disabled(pytest=True):
             pytest.skip('doctest encountered global skip directive')
@@ -181,12 +297,20 @@ class _XDoctestBase(pytest.Module):
                 directive = parse_directive_optstr(optpart)
                 default_runtime_state[directive.name] = directive.positive
 
-        self._examp_conf = {
+        # All examples collected by this node share a single config object
+        from xdoctest.doctest_example import Config
+        self._examp_conf = Config({
             'default_runtime_state': default_runtime_state,
             'colored': self.config.getvalue('xdoctest_colored'),
             'reportchoice': self.config.getoption("xdoctest_report"),
             'offset_linenos': self.config.getvalue('xdoctest_offset_linenos'),
-        }
+            'timeout': self.config.getvalue('xdoctest_timeout'),
+            'max_memory': self.config.getvalue('xdoctest_max_memory'),
+            'max_output': self.config.getvalue('xdoctest_max_output'),
+        })
+        # Examples that enable SHARED_NAMESPACE start from a common namespace
+        from xdoctest.doctest_example import SharedNamespace
+        self._shared_namespace = SharedNamespace()
 
 
 class XDoctestTextfile(_XDoctestBase):
@@ -206,8 +330,9 @@ class XDoctestTextfile(_XDoctestBase):
 
         for example in core.parse_docstr_examples(text, name, fpath=filename, style=style):
             example.globs.update(globs)
-            example.config.update(self._examp_conf)
-            yield XDoctestItem(name, self, example)
+            example.config = self._examp_conf
+            example.shared_namespace = self._shared_namespace
+            yield _group_by_module(XDoctestItem(name, self, example), filename)
 
 
 class XDoctestModule(_XDoctestBase):
@@ -227,22 +352,94 @@ class XDoctestModule(_XDoctestBase):
                 raise
 
         for example in examples:
-            example.config.update(self._examp_conf)
+            example.config = self._examp_conf
+            example.shared_namespace = self._shared_namespace
             name = example.unique_callname
-            yield XDoctestItem(name, self, example)
+            yield _group_by_module(XDoctestItem(name, self, example), modpath)
+
+
+def _group_by_module(item, modpath):
+    """
+    Marks the item with an ``xdist_group`` named after the file it came from.
+
+    With ``pytest-xdist --dist loadgroup`` all doctests of a module are then
+    sent to the same worker, so expensive modules are imported only once
+    instead of once per worker. The mark is ignored by other schedulers.
+    """
+    item.add_marker(pytest.mark.xdist_group(name=modpath))
+    return item
+
+
+def _module_fixtureinfo(xdoctest_item):
+    """
+    Returns the fixture info shared by all doctests of the item's parent.
+
+    Doctests do not request fixtures by argument, so the only fixtures in the
+    closure are the autouse fixtures visible to the module. These are the
+    same for every doctest it contains, so they are only computed once.
+    """
+    parent = xdoctest_item.parent
+    fixtureinfo = getattr(parent, '_xdoctest_fixtureinfo', None)
+    if fixtureinfo is None:
+        def func():
+            pass
+        fm = xdoctest_item.session._fixturemanager
+        fixtureinfo = fm.getfixtureinfo(node=xdoctest_item, func=func,
+                                        cls=None, funcargs=False)
+        parent._xdoctest_fixtureinfo = fixtureinfo
+    return fixtureinfo
+
+
+def _xdoctest_namespace(xdoctest_item):
+    """
+    Returns the value of the ``xdoctest_namespace`` fixture for an item.
+
+    The default fixture is session scoped, so its value is requested once
+    per module and reused by the remaining doctests of that module, as long
+    as pytest has not torn the fixture down. Function-scoped overrides are
+    still requested for every doctest.
+    """
+    parent = xdoctest_item.parent
+    cached = getattr(parent, '_xdoctest_namespace', None)
+    if cached is not None:
+        fixturedef, namespace = cached
+        result = fixturedef.cached_result
+        if result is not None and result[0] is namespace:
+            return namespace
+        parent._xdoctest_namespace = None
+    if xdoctest_item.fixture_request is None:
+        xdoctest_item.fixture_request = _setup_fixtures(xdoctest_item)
+    namespace = xdoctest_item.fixture_request.getfixturevalue(
+        'xdoctest_namespace')
+    fixturedef = _namespace_fixturedef(xdoctest_item)
+    if fixturedef is not None and fixturedef.scope in {'session', 'package', 'module'}:
+        parent._xdoctest_namespace = (fixturedef, namespace)
+    return namespace
+
+
+def _namespace_fixturedef(xdoctest_item):
+    """
+    Returns the definition of ``xdoctest_namespace`` that applies to an item
+    """
+    fm = xdoctest_item.session._fixturemanager
+    try:
+        fixturedefs = fm.getfixturedefs('xdoctest_namespace',
+                                        xdoctest_item.nodeid)
+    except AttributeError:
+        # pytest >= 8.1 takes the node instead of its id
+        fixturedefs = fm.getfixturedefs('xdoctest_namespace', xdoctest_item)
+    if not fixturedefs:
+        return None
+    # The last definition is the closest override
+    return fixturedefs[-1]
 
 
 def _setup_fixtures(xdoctest_item):
     """
     Used by XDoctestTextfile and XDoctestItem to setup fixture information.
     """
-    def func():
-        pass
-
     xdoctest_item.funcargs = {}
-    fm = xdoctest_item.session._fixturemanager
-    xdoctest_item._fixtureinfo = fm.getfixtureinfo(node=xdoctest_item, func=func,
-                                                   cls=None, funcargs=False)
+    xdoctest_item._fixtureinfo = _module_fixtureinfo(xdoctest_item)
     fixture_request = fixtures.FixtureRequest(xdoctest_item)
     fixture_request._fillfixtures()
     return fixture_request
@@ -8,9 +8,13 @@ from xdoctest import dynamic_analysis as dynamic
 from xdoctest import core
 from xdoctest import doctest_example
 from xdoctest import utils
+import collections
 import time
 import warnings
 import sys
+import os
+import io
+import re
 
 
 def doctest_module(modpath_or_name=None, command=None, argv=None, exclude=[],
@@ -27,7 +31,16 @@ def doctest_module(modpath_or_name=None, command=None, argv=None, exclude=[],
         verbose (bool):  verbosity flag
         exclude (list): ignores any modname matching any of these
             glob-like patterns
-        config (dict): modifies each examples configuration
+        config (dict): modifies each examples configuration. The special
+            key ``fork`` runs each example in a forked child process (see
+            `DocTest.run_forked`), except for those that use the shared
+            namespace of their module. The special key ``async_jobs`` runs
+            up to that many examples that use top-level await concurrently.
+            The special keys ``jobs`` and ``threads`` run all examples in a
+            pool of that many threads. The special key ``profile`` reports
+            how often parsed docstrings were reused. The special key
+            ``dump_dpath`` makes the ``dump`` command write one test module
+            per source module to that directory (see `_dump_test_modules`).
 
     Example:
         >>> modname = 'xdoctest.dynamic_analysis'
@@ -53,22 +66,93 @@ def doctest_module(modpath_or_name=None, command=None, argv=None, exclude=[],
               ' pick from a list of valid choices:')
         command = 'list'
 
-    # TODO: command should not be allowed to be the requested doctest name in
-    # case it conflicts with an existing command. This probably requires an API
-    # change to this function.
-    gather_all = (command == 'all' or command == 'dump')
-
     tic = time.time()
 
-    # Parse all valid examples
+    # When a single test is requested, only its docstrings are parsed
+    callnames = None
+    if command not in {'list', 'all', 'dump'}:
+        callnames = {_command_callname(command)}
+
+    # Parse all valid examples. Functions without required arguments are
+    # noted on the way, in case the command names one of them.
+    zero_arg_index = {}
     with warnings.catch_warnings(record=True) as parse_warnlist:
-        examples = list(core.parse_doctestables(modpath, exclude=exclude,
-                                                style=style))
+        examples = list(core.parse_doctestables(
+            modpath, exclude=exclude, style=style,
+            zero_arg_index=zero_arg_index, callnames=callnames))
         # Set each example mode to native to signal that we are using the
         # native xdoctest runner instead of the pytest runner
         for example in examples:
             example.mode = 'native'
 
+    return _run_collected(examples, command, verbose, config,
+                          parse_warnlist, tic, zero_arg_index=zero_arg_index,
+                          root=modpath)
+
+
+def doctest_docs(dpath, command=None, argv=None, exclude=[],
+                 style='freeform', verbose=None, config=None):
+    """
+    Executes requested doctests in the documentation files under a directory.
+
+    Doctests are collected from the code blocks of rst, markdown, and text
+    files by `core.parse_docs_tree`. Each file with examples is a test named
+    by its path relative to `dpath`. Otherwise this works like
+    `doctest_module`.
+
+    Args:
+        dpath (str): path to a directory of documentation or a single file
+        command (str): determines which doctests to run.
+            if command is None, this is determined by parsing sys.argv
+        argv (list): if None uses sys.argv
+        exclude (list): ignores any relative file path matching any of these
+            glob-like patterns
+        style (str): expected doctest style (default freeform)
+        verbose (bool):  verbosity flag
+        config (dict): modifies each examples configuration
+            (see `doctest_module`)
+
+    Example:
+        >>> from os.path import dirname, join
+        >>> import xdoctest
+        >>> dpath = join(dirname(dirname(xdoctest.__file__)), 'README.rst')
+        >>> result = doctest_docs(dpath, 'list', argv=[''])
+    """
+    print('Start doctest_docs({!r})'.format(dpath))
+    command, style, verbose = _parse_commandline(command, style, verbose, argv)
+
+    if command == 'list':
+        print('Listing tests')
+
+    if command is None:
+        # Display help if command is not specified
+        print('Not testname given. Use `all` to run everything or'
+              ' pick from a list of valid choices:')
+        command = 'list'
+
+    tic = time.time()
+
+    with warnings.catch_warnings(record=True) as parse_warnlist:
+        examples = list(core.parse_docs_tree(dpath, exclude=exclude,
+                                             style=style))
+        for example in examples:
+            example.mode = 'native'
+
+    return _run_collected(examples, command, verbose, config, parse_warnlist,
+                          tic, root=dpath)
+
+
+def _run_collected(examples, command, verbose, config, parse_warnlist, tic,
+                   zero_arg_index=None, root=None):
+    """
+    Lists, dumps, or runs the collected examples selected by `command`. The
+    examples were collected from the module, package, or directory `root`.
+    """
+    # TODO: command should not be allowed to be the requested doctest name in
+    # case it conflicts with an existing command. This probably requires an API
+    # change to this function.
+    gather_all = (command == 'all' or command == 'dump')
+
     if command == 'list':
         if len(examples) == 0:
             print('... no docstrings with examples found')
@@ -85,24 +169,44 @@ def doctest_module(modpath_or_name=None, command=None, argv=None, exclude=[],
                     continue
                 enabled_examples.append(example)
 
-        if len(enabled_examples) == 0:
+        if len(enabled_examples) == 0 and zero_arg_index:
             # Check for zero-arg funcs
-            for example in _gather_zero_arg_examples(modpath):
-                if command in example.valid_testnames:
-                    enabled_examples.append(example)
+            enabled_examples.extend(
+                _lookup_zero_arg_examples(zero_arg_index, command))
 
         if config:
+            # All examples share a single config object
+            config = doctest_example.Config(config)
             for example in enabled_examples:
-                example.config.update(config)
+                example.config = config
+
+        # Examples that enable SHARED_NAMESPACE start from a namespace
+        # common to the examples of their module
+        shared_namespaces = collections.defaultdict(
+            doctest_example.SharedNamespace)
+        for example in enabled_examples:
+            example.shared_namespace = shared_namespaces[example.modpath]
 
         if command == 'dump':
             # format the doctests as normal unit tests
-            print('dumping tests to stdout')
-            _convert_to_test_module(enabled_examples)
+            dump_dpath = config and config.get('dump_dpath')
+            if dump_dpath:
+                print('dumping tests to {}'.format(dump_dpath))
+                _dump_test_modules(enabled_examples, dump_dpath, root)
+            else:
+                print('dumping tests to stdout')
+                _convert_to_test_module(enabled_examples)
             run_summary = {'action': 'dump'}
         else:
             # Run the gathered doctest examples
-            run_summary = _run_examples(enabled_examples, verbose)
+            fork = bool(config and config.get('fork', False))
+            async_jobs = (config and config.get('async_jobs')) or 0
+            jobs = (config and config.get('jobs')) or 0
+            threads = bool(config and config.get('threads', False))
+            max_memory = (config and config.get('max_memory')) or None
+            run_summary = _run_examples(enabled_examples, verbose, fork=fork,
+                                        async_jobs=async_jobs, jobs=jobs,
+                                        threads=threads, max_memory=max_memory)
 
             toc = time.time()
             n_seconds = toc - tic
@@ -112,6 +216,9 @@ def doctest_module(modpath_or_name=None, command=None, argv=None, exclude=[],
                 _print_summary_report(run_summary, parse_warnlist, n_seconds,
                                       enabled_examples)
 
+    if config and config.get('profile', False):
+        print(core.format_parse_memo_info())
+
     return run_summary
 
 
@@ -122,25 +229,210 @@ def _convert_to_test_module(enabled_examples):
     module_lines = []
     for example in enabled_examples:
         # Create a unit-testable function for this example
-        func_name = 'test_' + example.callname.replace('.', '_')
-        body_lines = []
-        for part in example._parts:
-            body_part = part.format_src(linenos=False, want=False,
-                                        prefix=False, colored=False,
-                                        partnos=False)
-            if part.want:
-                want_text = '# doctest want:\n'
-                want_text += utils.indent(part.want, '# ')
-                body_part += '\n' + want_text
-            body_lines.append(body_part)
-        body = '\n'.join(body_lines)
-        func_text = 'def {}():\n'.format(func_name) + utils.indent(body)
+        func_name, func_text, _ = _convert_to_test_func(example)
         module_lines.append(func_text)
 
     module_text = '\n\n\n'.join(module_lines)
     print(module_text)
 
 
+def _convert_to_test_func(example):
+    """
+    Converts one doctest to the text of a unit test function.
+
+    Returns:
+        Tuple[str, str, list]: the name and text of the function and its line
+            map, which has a ``[line, source_line, n_lines]`` entry for each
+            part, where ``line`` counts from 1 at the ``def`` line.
+    """
+    func_name = 'test_' + re.sub(r'\W', '_', example.callname)
+    if example.num:
+        func_name += '_{}'.format(example.num)
+    body_lines = []
+    linemap = []
+    for part in example._parts:
+        body_part = part.format_part(linenos=False, want=False,
+                                     prefix=False, colored=False,
+                                     partnos=False)
+        part_lines = body_part.split('\n')
+        if example.lineno is not None:
+            linemap.append([len(body_lines) + 2,
+                            example.lineno + part.line_offset,
+                            len(part_lines)])
+        body_lines.extend(part_lines)
+        if part.want:
+            want_text = '# doctest want:\n'
+            want_text += utils.indent(part.want, '# ')
+            body_lines.extend(want_text.split('\n'))
+    body = '\n'.join(body_lines)
+    func_text = 'def {}():\n'.format(func_name) + utils.indent(body)
+    return func_name, func_text, linemap
+
+
+_DUMP_MANIFEST = 'xdoctest_dump.json'
+
+_DUMP_HEADER = utils.codeblock(
+    '''
+    # Generated by xdoctest from {fpath}
+    import importlib
+
+
+    def _import_star(modname):
+        # Star imports are not allowed inside of the test functions
+        module = importlib.import_module(modname)
+        names = getattr(module, '__all__', None)
+        if names is None:
+            names = [key for key in vars(module) if not key.startswith('_')]
+        globals().update({{name: getattr(module, name) for name in names}})
+    ''')
+
+_DUMP_IMPORT = utils.codeblock(
+    '''
+    # Doctests run in the namespace of their module
+    globals().update({{
+        key: value
+        for key, value in vars(importlib.import_module({modname!r})).items()
+        if not key.startswith('__') and not key.lower().startswith('test')}})
+    ''')
+
+_STAR_IMPORT_RE = re.compile(r'^(\s*)from\s+([\w.]+)\s+import\s+\*(.*)$',
+                             flags=re.MULTILINE)
+
+
+def _dump_test_modules(enabled_examples, dpath, root):
+    """
+    Writes the doctests of each source file as a test module in `dpath`.
+
+    Each test module is written as soon as its doctests are converted. The
+    manifest ``xdoctest_dump.json`` in `dpath` records the generated file,
+    the modification time and size of each source file, and a line map from
+    every generated test back to its doctest. Test modules of unchanged
+    source files are kept as they are, and those of source files under
+    `root` that no longer have doctests are removed. Several packages can be
+    dumped to the same directory.
+
+    Args:
+        enabled_examples (list): the examples to write
+        dpath (str): the directory to write to
+        root (str): the module, package, or directory the examples were
+            collected from
+
+    Returns:
+        dict: the manifest
+    """
+    import json
+    import itertools as it
+    from os.path import basename, dirname, exists, join, realpath
+    manifest_fpath = join(dpath, _DUMP_MANIFEST)
+    if not exists(dpath):
+        os.makedirs(dpath)
+    manifest = {'modules': {}}
+    if exists(manifest_fpath):
+        try:
+            with open(manifest_fpath, 'r') as file:
+                manifest = json.load(file)
+        except ValueError:
+            pass
+    entries = manifest['modules']
+    # Generated file names are checked against those of other source files
+    taken = {entry['fname']: fpath for fpath, entry in entries.items()}
+
+    seen = set()
+    n_written = 0
+    for fpath, group in it.groupby(enabled_examples, lambda e: e.fpath):
+        group = list(group)
+        seen.add(fpath)
+        stat = os.stat(fpath)
+        stat = [stat.st_mtime, stat.st_size]
+        entry = entries.get(fpath, None)
+        if (entry is not None and entry['stat'] == stat and
+                exists(join(dpath, entry['fname']))):
+            continue
+        fname = _dump_fname(group, fpath, taken)
+        taken[fname] = fpath
+        entries[fpath] = _write_test_module(group, fpath, dpath, fname)
+        entries[fpath]['stat'] = stat
+        n_written += 1
+
+    # Remove the tests of files that no longer have doctests. Files outside
+    # of root were dumped by other runs and are left alone.
+    root = realpath(root)
+    if basename(root) == '__init__.py':
+        root = dirname(root)
+    for fpath in set(entries) - seen:
+        real_fpath = realpath(fpath)
+        if real_fpath != root and not real_fpath.startswith(root + os.sep):
+            continue
+        test_fpath = join(dpath, entries.pop(fpath)['fname'])
+        taken.pop(basename(test_fpath), None)
+        if exists(test_fpath):
+            os.remove(test_fpath)
+
+    with open(manifest_fpath, 'w') as file:
+        json.dump(manifest, file, indent=1, sort_keys=True)
+    print('wrote {} of {} test modules to {}'.format(
+        n_written, len(seen), dpath))
+    return manifest
+
+
+def _dump_fname(examples, fpath, taken):
+    """
+    Chooses the name of the test module of one source file. Names that map
+    to the same file (e.g. of ``pkg.a_b`` and ``pkg.a.b``) are numbered.
+
+    Example:
+        >>> from xdoctest import doctest_example
+        >>> example = doctest_example.DocTest('>>> pass')
+        >>> example.modname = 'pkg.a_b'
+        >>> taken = {'test_pkg_a_b.py': 'pkg/a/b.py'}
+        >>> _dump_fname([example], 'pkg/a_b.py', taken)
+        'test_pkg_a_b_2.py'
+        >>> _dump_fname([example], 'pkg/a/b.py', taken)
+        'test_pkg_a_b.py'
+    """
+    modname = examples[0].modname
+    if modname.startswith('<'):
+        # Not an importable module, e.g. a documentation file
+        name = examples[0].callname
+    else:
+        name = modname
+    stem = 'test_' + re.sub(r'\W', '_', name)
+    fname = stem + '.py'
+    count = 1
+    while taken.get(fname, fpath) != fpath:
+        count += 1
+        fname = '{}_{}.py'.format(stem, count)
+    return fname
+
+
+def _write_test_module(examples, fpath, dpath, fname):
+    """
+    Writes the doctests of one source file and returns its manifest entry
+    """
+    from os.path import join
+    modname = examples[0].modname
+    header = _DUMP_HEADER.format(fpath=fpath)
+    if not modname.startswith('<'):
+        header += '\n\n\n' + _DUMP_IMPORT.format(modname=modname)
+    tests = {}
+    with io.open(join(dpath, fname), 'w', encoding='utf8') as file:
+        file.write(header + '\n')
+        n_lines = header.count('\n') + 1
+        for example in examples:
+            func_name, func_text, linemap = _convert_to_test_func(example)
+            func_text = _STAR_IMPORT_RE.sub(r"\1_import_star('\2')\3",
+                                            func_text)
+            file.write('\n\n' + func_text + '\n')
+            def_lineno = n_lines + 3
+            n_lines += 2 + func_text.count('\n') + 1
+            tests[func_name] = {
+                'callname': example.callname,
+                'lines': [[def_lineno + line - 1, source_line, count]
+                          for line, source_line, count in linemap],
+            }
+    return {'fname': fname, 'tests': tests}
+
+
 def _print_summary_report(run_summary, parse_warnlist, n_seconds,
                           enabled_examples):
     """
@@ -210,32 +502,84 @@ def _print_summary_report(run_summary, parse_warnlist, n_seconds,
     print(summary_line)
 
 
-def _gather_zero_arg_examples(modpath):
+def _command_callname(command):
     """
-    Find functions in `modpath` args  with no args (so we can automatically
-    make a dummy docstring).
+    Returns the callname of a test requested as ``callname`` or
+    ``callname:num``.
+
+    Example:
+        >>> _command_callname('Class.method:1')
+        'Class.method'
+        >>> _command_callname('func')
+        'func'
     """
-    for calldefs, _modpath in core.package_calldefs(modpath):
-        for callname, calldef in calldefs.items():
-            if calldef.args is not None:
-                # The only existing args should have defaults
-                n_args = len(calldef.args.args) - len(calldef.args.defaults)
-                if n_args == 0:
-                    # Create a dummy doctest example for a zero-arg function
-                    docsrc = '>>> {}()'.format(callname)
-                    example = doctest_example.DocTest(docsrc=docsrc,
-                                                      modpath=_modpath,
-                                                      callname=callname,
-                                                      block_type='zero-arg')
-                    example.mode = 'native'
-                    yield example
-
-
-def _run_examples(enabled_examples, verbose):
+    callname, sep, num = command.rpartition(':')
+    if sep and num.isdigit():
+        return callname
+    return command
+
+
+def _lookup_zero_arg_examples(zero_arg_index, command):
+    """
+    Returns examples for the zero-arg functions named by `command` (with or
+    without the ``:0`` suffix) using the index built during collection.
+    """
+    callname = command
+    if command.endswith(':0'):
+        callname = command[:-2]
+    return [_zero_arg_example(callname, modpath)
+            for modpath in zero_arg_index.get(callname, [])]
+
+
+def _zero_arg_example(callname, modpath):
+    # Create a dummy doctest example for a zero-arg function
+    docsrc = '>>> {}()'.format(callname)
+    example = doctest_example.DocTest(docsrc=docsrc, modpath=modpath,
+                                      callname=callname,
+                                      block_type='zero-arg')
+    example.mode = 'native'
+    return example
+
+
+def _run_examples(enabled_examples, verbose, fork=False, async_jobs=0,
+                  jobs=0, threads=False, max_memory=None):
     """
     Internal helper, loops over each example, runs it, returns a summary
     """
+    if max_memory and (async_jobs > 1 or jobs > 1) and not fork:
+        # Memory limits are process wide and cannot be given to one thread
+        if hasattr(os, 'fork'):
+            warnings.warn('max_memory cannot be enforced in threads, '
+                          'running doctests forked instead')
+            fork = True
+            async_jobs = jobs = 0
+        else:  # nocover
+            warnings.warn('max_memory cannot be enforced in threads, '
+                          'running doctests serially')
+            async_jobs = jobs = 0
+    if fork and not hasattr(os, 'fork'):  # nocover
+        warnings.warn('os.fork is not available, running doctests in-process')
+        fork = False
+    if jobs > 1 and not threads:
+        warnings.warn('jobs > 1 requires threads, running doctests serially')
+        jobs = 0
+    if fork and (async_jobs or jobs):
+        warnings.warn('jobs are ignored when examples are forked')
+        async_jobs = jobs = 0
     n_total = len(enabled_examples)
+    # Examples may run ahead in a thread pool. Their results are then
+    # reported in order with all others. Examples using a module's shared
+    # namespace depend on the one before them and always run in order.
+    prerun = {}
+    if jobs > 1:
+        prerun = _run_in_threads(
+            [example for example in enabled_examples
+             if not example._uses_shared_namespace()],
+            verbose, jobs)
+    elif async_jobs > 1:
+        prerun = _run_in_threads(
+            [example for example in enabled_examples if example.is_async()],
+            verbose, async_jobs)
     print('running %d test(s)' % n_total)
     summaries = []
     failed = []
@@ -247,7 +591,14 @@ def _run_examples(enabled_examples, verbose):
     on_error = 'return'
     for example in enabled_examples:
         try:
-            summary = example.run(verbose=verbose, on_error=on_error)
+            if id(example) in prerun:
+                summary, text = prerun.pop(id(example))
+                sys.stdout.write(text)
+            elif fork and not example._uses_shared_namespace():
+                # Examples sharing a namespace must run in this process
+                summary = example.run_forked(verbose=verbose)
+            else:
+                summary = example.run(verbose=verbose, on_error=on_error)
         except Exception:
             print('\n'.join(example.repr_failure(with_tb=False)))
             raise
@@ -271,6 +622,8 @@ def _run_examples(enabled_examples, verbose):
                 print('\n'.join(example.repr_failure()))
                 ex_value = example.exc_info[1]
                 raise ex_value
+        # Only failed examples need to keep their state for the final report
+        example.release()
 
         # except Exception:
         #     summary = {'passed': False}
@@ -300,6 +653,37 @@ def _run_examples(enabled_examples, verbose):
     return run_summary
 
 
+def _run_in_threads(examples, verbose, jobs):
+    """
+    Runs examples in `jobs` threads. Output and warnings are captured per
+    thread, and examples that use top-level await share one event loop so
+    their awaits overlap. The output of each example is returned with its
+    summary, keyed by the id of the example.
+
+    Note:
+        Time limits can only be enforced in the main thread and are skipped
+        with a warning.
+    """
+    if not examples:
+        return {}
+    from concurrent.futures import ThreadPoolExecutor
+
+    def _run(example):
+        with utils.CaptureStdout(supress=True) as cap:
+            summary = example.run(verbose=verbose, on_error='return')
+        return summary, cap.text
+
+    # Import modules up front; concurrent imports would race on sys.path
+    for example in examples:
+        example._import_module()
+
+    n_workers = min(jobs, len(examples))
+    with utils.RoutedOutput(), utils.SharedLoopThread():
+        with ThreadPoolExecutor(n_workers) as pool:
+            results = list(pool.map(_run, examples))
+    return {id(example): result for example, result in zip(examples, results)}
+
+
 def _parse_commandline(command=None, style='auto', verbose=None, argv=None):
     # Determine command via sys.argv if not specified
     if argv is None:
@@ -5,7 +5,6 @@ import sys
 import ast
 import re
 import six
-import tokenize
 import sysconfig
 from six.moves import cStringIO as StringIO
 from collections import deque, OrderedDict
@@ -119,8 +118,32 @@ class TopLevelVisitor(ast.NodeVisitor):
                 calldef.lineno_end = lineno_end
 
     def visit(self, node):
-        self.process_finished(node)
-        super(TopLevelVisitor, self).visit(node)
+        """
+        Iteratively walks the tree starting at `node`.
+
+        Every node reached is visited, but the walk only descends into
+        statements that can contain doctestable definitions (e.g. module,
+        class, if, try, and with blocks). Expressions and simple statements
+        cannot, so their subtrees are skipped. The `visit_<classname>`
+        methods return the child nodes to descend into.
+        """
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if not isinstance(node, ast.AST):
+                # A deferred action that runs after a node's children
+                node()
+                continue
+            self.process_finished(node)
+            method = getattr(self, 'visit_' + node.__class__.__name__, None)
+            if method is not None:
+                children = method(node)
+            elif isinstance(node, _CONTAINER_NODES):
+                children = _child_nodes(node)
+            else:
+                children = None
+            if children:
+                stack.extend(children[::-1])
 
     def visit_FunctionDef(self, node):
         if self._current_classname is None:
@@ -145,10 +168,11 @@ class TopLevelVisitor(ast.NodeVisitor):
                                   doclineno_end)
             self.calldefs[callname] = calldef
 
-            self.generic_visit(node)
-            self._current_classname = None
+            def _finish_class():
+                self._current_classname = None
+                self._finish_queue.append(calldef)
 
-            self._finish_queue.append(calldef)
+            return _child_nodes(node) + [_finish_class]
 
     def visit_Module(self, node):
         # get the module level docstr
@@ -161,7 +185,7 @@ class TopLevelVisitor(ast.NodeVisitor):
                                   doclineno_end)
             self.calldefs[callname] = calldef
 
-        self.generic_visit(node)
+        return node.body
         # self._finish_queue.append(calldef)
 
     def visit_Assign(self, node):
@@ -174,7 +198,6 @@ class TopLevelVisitor(ast.NodeVisitor):
             # print('node.value = %r' % (node.value,))
             # TODO: assign constants to
             # self.const_lookup
-        self.generic_visit(node)
 
     def visit_If(self, node):
         if isinstance(node.test, ast.Compare):  # pragma: nobranch
@@ -188,7 +211,7 @@ class TopLevelVisitor(ast.NodeVisitor):
                     return
             except Exception:  # nocover
                 pass
-        self.generic_visit(node)  # nocover
+        return _child_nodes(node)
 
     # def visit_ExceptHandler(self, node):
     #     pass
@@ -207,11 +230,17 @@ class TopLevelVisitor(ast.NodeVisitor):
     # -- helpers ---
 
     def _docnode_line_workaround(self, docnode):
-        # lineno points to the last line of a string
-        endpos = docnode.lineno - 1
-        docstr = utils.ensure_unicode(docnode.value.s)
-        sourcelines = self.sourcelines
-        start, stop = self._docstr_line_workaround(docstr, sourcelines, endpos)
+        end_lineno = getattr(docnode, 'end_lineno', None)
+        if end_lineno is not None:
+            # Python 3.8+ records where the string starts and ends
+            start, stop = docnode.lineno - 1, end_lineno
+        else:
+            # lineno points to the last line of a string
+            endpos = docnode.lineno - 1
+            docstr = utils.ensure_unicode(docnode.value.s)
+            sourcelines = self.sourcelines
+            start, stop = self._docstr_line_workaround(docstr, sourcelines,
+                                                       endpos)
         # Convert 0-based line positions to 1-based line numbers
         doclineno = start + 1
         doclineno_end = stop
@@ -288,7 +317,8 @@ class TopLevelVisitor(ast.NodeVisitor):
             >>>     funcnode = pt.body[i]
             >>>     docnode = funcnode.body[0]
             >>>     docstr = ast.get_docstring(funcnode, clean=False)
-            >>>     endpos = docnode.lineno - 1
+            >>>     # lineno is the first line of the string in Python 3.8+
+            >>>     endpos = getattr(docnode, 'end_lineno', docnode.lineno) - 1
             >>>     start, end = self._docstr_line_workaround(docstr, sourcelines, endpos)
             >>>     print('got  = {}, {}'.format(start, end))
             >>>     print('want = {}, {}'.format(*targets[i]))
@@ -393,6 +423,31 @@ class TopLevelVisitor(ast.NodeVisitor):
         return lineno
 
 
+def _child_nodes(node):
+    """
+    Returns the direct children of an ast node in the order
+    `ast.NodeVisitor.generic_visit` would visit them.
+    """
+    children = []
+    for field in node._fields:
+        value = getattr(node, field, None)
+        if isinstance(value, list):
+            children.extend(item for item in value
+                            if isinstance(item, ast.AST))
+        elif isinstance(value, ast.AST):
+            children.append(value)
+    return children
+
+
+# Nodes without a visit method whose children may include doctestable
+# definitions, or assignments that TopLevelVisitor records.
+_CONTAINER_NODES = tuple(getattr(ast, name) for name in [
+    'For', 'AsyncFor', 'While', 'With', 'AsyncWith', 'Try', 'TryStar',
+    'TryExcept', 'TryFinally', 'ExceptHandler', 'Match', 'match_case',
+    'AsyncFunctionDef',
+] if hasattr(ast, name))
+
+
 def parse_calldefs(source=None, fpath=None):
     """
     Statically finds top-level callable functions and methods in python source
@@ -978,6 +1033,7 @@ def is_balanced_statement(lines):
         >>> #assert is_balanced_statement(['== ']) is False
 
     """
+    import tokenize
     block = '\n'.join(lines)
     if six.PY2:
         block = block.encode('utf8')
@@ -1019,6 +1075,7 @@ def extract_comments(source):
         >>> comments = list(extract_comments(source.splitlines()))
         >>> assert comments == ['# comment 1', '# comment 2']
     """
+    import tokenize
     if not isinstance(source, six.string_types):
         source = '\n'.join(source)
     if six.PY2:
@@ -7,28 +7,40 @@ This __init__ file is generated using mkinit:
 
     mkinit xdoctest.utils
 """
+from xdoctest.utils import util_async
 from xdoctest.utils import util_import
+from xdoctest.utils import util_limits
 from xdoctest.utils import util_misc
 from xdoctest.utils import util_mixins
 from xdoctest.utils import util_path
 from xdoctest.utils import util_str
 from xdoctest.utils import util_stream
 
+from xdoctest.utils.util_async import (CO_COROUTINE, SharedLoopThread,
+                                       TOP_LEVEL_AWAIT_FLAG,
+                                       is_coroutine_code, run_awaitable,
+                                       shared_event_loop,)
 from xdoctest.utils.util_import import (PythonPathContext,
                                         import_module_from_name,
                                         import_module_from_path,)
+from xdoctest.utils.util_limits import (ResourceLimits, TimeLimitExceeded,)
 from xdoctest.utils.util_misc import (TempDoctest,)
 from xdoctest.utils.util_mixins import (NiceRepr,)
 from xdoctest.utils.util_path import (TempDir, ensuredir,)
 from xdoctest.utils.util_str import (add_line_numbers, codeblock, color_text,
                                      ensure_unicode, highlight_code, indent,
                                      strip_ansi,)
-from xdoctest.utils.util_stream import (CaptureStdout, CaptureStream,
-                                        TeeStringIO,)
+from xdoctest.utils.util_stream import (CaptureBuffer, CaptureStdout,
+                                        CaptureStream, CaptureWarnings,
+                                        RoutedOutput, TeeStringIO,)
 
-__all__ = ['CaptureStdout', 'CaptureStream', 'NiceRepr', 'PythonPathContext',
-           'TeeStringIO', 'TempDir', 'TempDoctest', 'add_line_numbers',
-           'codeblock', 'color_text', 'ensure_unicode', 'ensuredir',
-           'highlight_code', 'import_module_from_name',
-           'import_module_from_path', 'indent', 'strip_ansi', 'util_import',
+__all__ = ['CO_COROUTINE', 'CaptureBuffer', 'CaptureStdout', 'CaptureStream',
+           'CaptureWarnings', 'NiceRepr', 'PythonPathContext',
+           'ResourceLimits', 'RoutedOutput', 'SharedLoopThread',
+           'TOP_LEVEL_AWAIT_FLAG', 'TeeStringIO', 'TempDir', 'TempDoctest',
+           'TimeLimitExceeded', 'add_line_numbers', 'codeblock', 'color_text',
+           'ensure_unicode', 'ensuredir', 'highlight_code',
+           'import_module_from_name', 'import_module_from_path', 'indent',
+           'is_coroutine_code', 'run_awaitable', 'shared_event_loop',
+           'strip_ansi', 'util_async', 'util_import', 'util_limits',
            'util_misc', 'util_mixins', 'util_path', 'util_str', 'util_stream']
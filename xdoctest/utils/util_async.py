@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+Support for running doctests that use top-level ``await``.
+
+All awaitables are run on one shared event loop, so objects created in one
+part of a doctest (e.g. a client session) can be used in later parts. The
+loop either runs in the calling thread for the duration of each await, or,
+inside of `SharedLoopThread`, in a background thread where awaits from
+several doctests overlap.
+"""
+from __future__ import print_function, division, absolute_import, unicode_literals
+import sys
+import threading
+
+# The compile flag and code flag that enable / mark top-level await
+if sys.version_info[0:2] >= (3, 8):
+    import ast
+    TOP_LEVEL_AWAIT_FLAG = ast.PyCF_ALLOW_TOP_LEVEL_AWAIT
+    CO_COROUTINE = 0x0080  # inspect.CO_COROUTINE
+else:  # nocover
+    TOP_LEVEL_AWAIT_FLAG = 0
+    CO_COROUTINE = 0
+
+_SHARED_LOOP = []
+
+
+def shared_event_loop():
+    """
+    Returns the event loop used to run top-level awaits in doctests.
+
+    Example:
+        >>> from xdoctest.utils.util_async import *
+        >>> assert shared_event_loop() is shared_event_loop()
+    """
+    import asyncio
+    if not _SHARED_LOOP or _SHARED_LOOP[0].is_closed():
+        if not _SHARED_LOOP:
+            import atexit
+            atexit.register(_close_shared_event_loop)
+        _SHARED_LOOP[:] = [asyncio.new_event_loop()]
+    return _SHARED_LOOP[0]
+
+
+def _close_shared_event_loop():
+    """
+    Closes the shared loop when the interpreter exits
+    """
+    if _SHARED_LOOP:
+        loop = _SHARED_LOOP[0]
+        if not loop.is_closed() and not loop.is_running():
+            try:
+                loop.run_until_complete(loop.shutdown_asyncgens())
+            finally:
+                loop.close()
+
+
+def is_coroutine_code(code):
+    """
+    True if `code` was compiled from source that uses top-level await.
+    """
+    return bool(CO_COROUTINE and code.co_flags & CO_COROUTINE)
+
+
+def run_awaitable(awaitable):
+    """
+    Runs `awaitable` to completion on the shared loop and returns its result.
+
+    Example:
+        >>> import asyncio
+        >>> from xdoctest.utils.util_async import *
+        >>> run_awaitable(asyncio.sleep(0, result='done'))
+        'done'
+        >>> # Also works when the calling thread already runs another loop
+        >>> async def outer():
+        >>>     return run_awaitable(asyncio.sleep(0, result='nested'))
+        >>> other = asyncio.new_event_loop()
+        >>> other.run_until_complete(outer())
+        'nested'
+        >>> other.close()
+    """
+    import asyncio
+    loop = shared_event_loop()
+    running = asyncio._get_running_loop()
+    if running is loop or (
+            threading.current_thread() is _LOOP_THREAD.get('thread')):
+        raise RuntimeError('cannot await from inside the shared event loop')
+
+    if not loop.is_running():
+        if running is not None:
+            # The caller already runs another loop (e.g. in Jupyter or
+            # pytest-asyncio), so the shared loop runs in a thread instead.
+            with SharedLoopThread():
+                return run_awaitable(awaitable)
+        return loop.run_until_complete(awaitable)
+
+    # The loop runs in a background thread. Schedule the awaitable as a task
+    # that inherits this thread's context, so output capture and other
+    # context variables follow it.
+    import contextvars
+    import concurrent.futures
+    result = concurrent.futures.Future()
+
+    def _relay(task):
+        if task.cancelled():
+            result.cancel()
+        elif task.exception() is not None:
+            result.set_exception(task.exception())
+        else:
+            result.set_result(task.result())
+
+    def _schedule():
+        task = asyncio.ensure_future(awaitable, loop=loop)
+        task.add_done_callback(_relay)
+
+    loop.call_soon_threadsafe(_schedule, context=contextvars.copy_context())
+    return result.result()
+
+
+_LOOP_THREAD = {}
+
+
+class SharedLoopThread(object):
+    """
+    Runs the shared event loop in a background thread, so that several
+    threads calling `run_awaitable` have their awaits overlap.
+
+    Example:
+        >>> import asyncio
+        >>> import time
+        >>> from concurrent.futures import ThreadPoolExecutor
+        >>> from xdoctest.utils.util_async import *
+        >>> start = time.time()
+        >>> with SharedLoopThread(), ThreadPoolExecutor(4) as pool:
+        >>>     results = list(pool.map(run_awaitable, [
+        >>>         asyncio.sleep(0.2, result=idx) for idx in range(4)]))
+        >>> assert results == [0, 1, 2, 3]
+        >>> assert time.time() - start < 0.6
+    """
+    def __init__(self):
+        self.loop = None
+        self.thread = None
+
+    def __enter__(self):
+        self.loop = shared_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever,
+                                       name='xdoctest-event-loop')
+        self.thread.daemon = True
+        _LOOP_THREAD['thread'] = self.thread
+        # Wait until the loop runs, so awaits are never run in the caller
+        started = threading.Event()
+        self.loop.call_soon(started.set)
+        self.thread.start()
+        started.wait()
+        return self
+
+    def __exit__(self, type_, value, trace):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        _LOOP_THREAD.pop('thread', None)
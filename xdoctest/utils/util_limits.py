@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Utilities to bound the wall time and memory used by a block of code.
+"""
+from __future__ import print_function, division, absolute_import, unicode_literals
+import time
+import warnings
+
+
+class TimeLimitExceeded(BaseException):
+    """
+    Raised inside the limited code when its time limit expires.
+
+    This derives from `BaseException` so that a bare ``except Exception`` in
+    the limited code cannot swallow it.
+    """
+    pass
+
+
+class ResourceLimits(object):
+    """
+    Context manager that limits the wall time and the memory growth of the
+    code it wraps.
+
+    The time limit is enforced with `SIGALRM`, which raises
+    `TimeLimitExceeded` in the main thread. The timer only runs while the
+    context is entered: the same object may be entered several times and the
+    time spent inside all of the entries counts against one budget.
+
+    The memory limit lowers the soft `RLIMIT_AS` limit to the current address
+    space size plus `max_memory` megabytes, so allocations beyond it raise a
+    `MemoryError`. The limit is process wide, so it is applied the first time
+    the context is entered and never restored. Only use it in a process that
+    exits after running the limited code, such as a forked child.
+
+    Limits that cannot be enforced on the current platform (or outside of the
+    main thread) are skipped with a warning.
+
+    Args:
+        timeout (float): maximum number of seconds, None for no limit
+        max_memory (float): maximum number of megabytes the address space may
+            grow by, None for no limit
+
+    Example:
+        >>> # xdoctest: +REQUIRES(POSIX)
+        >>> from xdoctest.utils.util_limits import *
+        >>> limits = ResourceLimits(timeout=0.05)
+        >>> with limits:
+        >>>     pass
+        >>> import time
+        >>> time.sleep(0.1)  # time outside of the context is not counted
+        >>> try:
+        >>>     with limits:
+        >>>         while True:
+        >>>             pass
+        >>> except TimeLimitExceeded:
+        >>>     print('timed out')
+        timed out
+    """
+    def __init__(self, timeout=None, max_memory=None):
+        self.timeout = timeout
+        self.max_memory = max_memory
+        self.elapsed = 0.0
+        self._prev_handler = None
+        self._start = None
+        self._memory_limited = False
+
+    def __enter__(self):
+        if self.max_memory and not self._memory_limited:
+            self._memory_limited = True
+            self._lower_memory_limit()
+        if self.timeout:
+            self._start_timer()
+        return self
+
+    def __exit__(self, ex_type, ex_value, tb):
+        if self._prev_handler is not None:
+            import signal
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, self._prev_handler)
+            self._prev_handler = None
+            self.elapsed += time.time() - self._start
+            self._start = None
+
+    def _start_timer(self):
+        try:
+            import signal
+            signal.SIGALRM
+        except (ImportError, AttributeError):  # nocover
+            warnings.warn('timeouts are not supported on this platform')
+            return
+
+        timeout = self.timeout
+        remaining = timeout - self.elapsed
+        if remaining <= 0:
+            raise TimeLimitExceeded(
+                'exceeded the time limit of {} seconds'.format(timeout))
+
+        def _on_alarm(signum, frame):
+            raise TimeLimitExceeded(
+                'exceeded the time limit of {} seconds'.format(timeout))
+
+        try:
+            prev_handler = signal.signal(signal.SIGALRM, _on_alarm)
+        except ValueError:  # nocover
+            warnings.warn('timeouts can only be enforced in the main thread')
+            return
+        # The default handler is None when it was not installed from python
+        self._prev_handler = (signal.SIG_DFL if prev_handler is None
+                              else prev_handler)
+        self._start = time.time()
+        signal.setitimer(signal.ITIMER_REAL, remaining)
+
+    def _lower_memory_limit(self):
+        try:
+            import resource
+            import os
+            with open('/proc/self/statm') as file:
+                n_pages = int(file.read().split()[0])
+            current = n_pages * os.sysconf('SC_PAGE_SIZE')
+        except (ImportError, IOError, OSError, ValueError):  # nocover
+            warnings.warn('memory limits are not supported on this platform')
+            return
+        soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+        limit = current + int(self.max_memory * 1024 * 1024)
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        if soft != resource.RLIM_INFINITY:
+            limit = min(limit, soft)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
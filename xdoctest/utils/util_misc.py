@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 from __future__ import print_function, division, absolute_import, unicode_literals
 from os.path import join
-import random
 from .util_path import TempDir
 
 
@@ -17,6 +16,7 @@ class TempDoctest(object):
     """
     def __init__(self, docstr, modname=None):
         if modname is None:
+            import random
             # make a random temporary module name
             alphabet = list(map(chr, range(97, 97 + 26)))
             modname = ''.join([random.choice(alphabet) for _ in range(8)])
@@ -16,6 +16,8 @@ class NiceRepr(object):
         >>> assert 'object at' in str(foo)
         >>> assert 'object at' in repr(foo)
     """
+    __slots__ = ()
+
     def __repr__(self):
         try:
             classname = self.__class__.__name__
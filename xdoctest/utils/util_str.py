@@ -21,12 +21,14 @@ def strip_ansi(text):
         >>> escaped_line = strip_ansi(line)
         >>> assert escaped_line == '\tBlabla     172.18.0.2'
     """
-    # ansi_escape1 = re.compile(r'\x1b[^m]*m')
-    # text = ansi_escape1.sub('', text)
-    # ansi_escape2 = re.compile(r'\x1b\[([0-9,A-Z]{1,2}(;[0-9]{1,2})?(;[0-9]{3})?)?[m|K]?')
-    ansi_escape3 = re.compile(r'(\x9B|\x1B\[)[0-?]*[ -/]*[@-~]', flags=re.IGNORECASE)
-    text = ansi_escape3.sub('', text)
-    return text
+    if '\x1b' not in text and '\x9b' not in text:
+        return text
+    return _ANSI_ESCAPE_RE.sub('', text)
+
+
+# ansi_escape1 = re.compile(r'\x1b[^m]*m')
+# ansi_escape2 = re.compile(r'\x1b\[([0-9,A-Z]{1,2}(;[0-9]{1,2})?(;[0-9]{3})?)?[m|K]?')
+_ANSI_ESCAPE_RE = re.compile(r'(\x9B|\x1B\[)[0-?]*[ -/]*[@-~]', flags=re.IGNORECASE)
 
 
 def color_text(text, color):
@@ -145,21 +147,75 @@ def highlight_code(text, lexer_name='python', **kwargs):
         'cxx': 'cpp',
         'c': 'cpp',
     }.get(lexer_name.replace('.', ''), lexer_name)
+    options = _hashable_options(kwargs)
+    key = None if options is None else (lexer_name, options, text)
+    if key is not None and key in _HIGHLIGHT_CACHE:
+        return _HIGHLIGHT_CACHE[key]
     try:
         import pygments
-        import pygments.lexers
-        import pygments.formatters
-        import pygments.formatters.terminal
-        formater = pygments.formatters.terminal.TerminalFormatter(bg='dark')
-        lexer = pygments.lexers.get_lexer_by_name(lexer_name, ensurenl=False, **kwargs)
-        new_text = pygments.highlight(text, lexer, formater)
+        lexer, formatter = _pygments_lexer_formatter(lexer_name, **kwargs)
+        new_text = pygments.highlight(text, lexer, formatter)
     except ImportError:  # nocover
         import warnings
         warnings.warn('pygments is not installed')
         new_text = text
+    if key is not None:
+        if len(_HIGHLIGHT_CACHE) >= _HIGHLIGHT_CACHE_MAX:
+            _HIGHLIGHT_CACHE.clear()
+        _HIGHLIGHT_CACHE[key] = new_text
     return new_text
 
 
+# Highlighted text keyed by (lexer_name, options, text). Reports highlight the same
+# doctest source repeatedly (e.g. when verbose and again on failure).
+_HIGHLIGHT_CACHE = {}
+_HIGHLIGHT_CACHE_MAX = 1024
+
+# Pygments objects are expensive to construct and stateless once built, so a
+# single formatter and one lexer per language are shared by the process.
+_PYGMENTS_FORMATTER = []
+_PYGMENTS_LEXERS = {}
+
+
+def _hashable_options(kwargs):
+    """ returns lexer options as a cache key or None if they are unhashable """
+    options = tuple(sorted(kwargs.items()))
+    try:
+        hash(options)
+    except TypeError:
+        return None
+    return options
+
+
+def _pygments_lexer_formatter(lexer_name, **kwargs):
+    """
+    Returns a (lexer, formatter) pair for `lexer_name`, reusing cached
+    instances for previously seen lexer options.
+
+    Example:
+        >>> lexer1, formatter1 = _pygments_lexer_formatter('python')
+        >>> lexer2, formatter2 = _pygments_lexer_formatter('python')
+        >>> assert lexer1 is lexer2 and formatter1 is formatter2
+        >>> lexer3, _ = _pygments_lexer_formatter('python', stripall=True)
+        >>> assert lexer3 is not lexer1
+    """
+    import pygments.lexers
+    import pygments.formatters.terminal
+    if not _PYGMENTS_FORMATTER:
+        _PYGMENTS_FORMATTER.append(
+            pygments.formatters.terminal.TerminalFormatter(bg='dark'))
+    formatter = _PYGMENTS_FORMATTER[0]
+    options = _hashable_options(kwargs)
+    key = (lexer_name, options)
+    lexer = None if options is None else _PYGMENTS_LEXERS.get(key)
+    if lexer is None:
+        lexer = pygments.lexers.get_lexer_by_name(lexer_name, ensurenl=False,
+                                                  **kwargs)
+        if options is not None:
+            _PYGMENTS_LEXERS[key] = lexer
+    return lexer, formatter
+
+
 def add_line_numbers(source, start=1, n_digits=None):
     """
     Prefixes code with line numbers
@@ -3,6 +3,201 @@ from __future__ import print_function, division, absolute_import, unicode_litera
 import sys
 import six
 import io
+import threading
+import warnings
+
+
+class _ContextSlot(object):
+    """
+    Holds one value per execution context: per asyncio task and thread where
+    `contextvars` exists, otherwise per thread.
+    """
+    def __init__(self, name):
+        try:
+            import contextvars
+        except ImportError:  # nocover
+            self._var = None
+            self._local = threading.local()
+        else:
+            self._var = contextvars.ContextVar(name, default=None)
+
+    def get(self):
+        if self._var is None:  # nocover
+            return getattr(self._local, 'value', None)
+        return self._var.get()
+
+    def set(self, value):
+        """ sets the value and returns a token to restore the previous one """
+        if self._var is None:  # nocover
+            token = self.get()
+            self._local.value = value
+            return token
+        return self._var.set(value)
+
+    def reset(self, token):
+        if self._var is None:  # nocover
+            self._local.value = token
+        else:
+            self._var.reset(token)
+
+
+class _RoutedStdout(object):
+    """
+    Stand-in for sys.stdout that writes to the capture stream active in the
+    current context, or to the original stdout if there is none.
+    """
+    def __init__(self, stream):
+        self.stream = stream
+        self._slot = _ContextSlot('xdoctest_stdout')
+
+    def current(self):
+        stream = self._slot.get()
+        return self.stream if stream is None else stream
+
+    def push(self, stream):
+        return self._slot.set(stream)
+
+    def pop(self, token):
+        self._slot.reset(token)
+
+    def write(self, msg):
+        return self.current().write(msg)
+
+    def flush(self):
+        return self.current().flush()
+
+    def isatty(self):
+        stream = self.current()
+        return hasattr(stream, 'isatty') and stream.isatty()
+
+    def __getattr__(self, key):
+        return getattr(self.current(), key)
+
+
+class RoutedOutput(object):
+    r"""
+    Makes stdout and warning capture safe to use from several threads (or
+    asyncio tasks) at the same time.
+
+    While active, sys.stdout is replaced by a proxy and `CaptureStdout` /
+    `CaptureWarnings` register their buffers with the current context instead
+    of replacing the process-wide sys.stdout and warnings hooks.
+
+    Example:
+        >>> from xdoctest.utils.util_stream import *
+        >>> import threading
+        >>> caps = [CaptureStdout() for _ in range(4)]
+        >>> def worker(idx):
+        >>>     with caps[idx]:
+        >>>         for _ in range(100):
+        >>>             print(idx)
+        >>> with RoutedOutput():
+        >>>     threads = [threading.Thread(target=worker, args=(idx,))
+        >>>                for idx in range(4)]
+        >>>     [t.start() for t in threads]
+        >>>     [t.join() for t in threads]
+        >>> for idx, cap in enumerate(caps):
+        >>>     assert cap.text == '{}\n'.format(idx) * 100
+    """
+    def __init__(self):
+        self._router = None
+        self._catcher = None
+        self._orig_showwarning = None
+
+    def __enter__(self):
+        if not isinstance(sys.stdout, _RoutedStdout):
+            self._router = _RoutedStdout(sys.stdout)
+            sys.stdout = self._router
+            # The warning filters are process wide and cannot be reset for
+            # each capture, so every warning is shown while routing.
+            self._catcher = warnings.catch_warnings()
+            self._catcher.__enter__()
+            warnings.simplefilter('always')
+            self._orig_showwarning = warnings.showwarning
+            warnings.showwarning = self._showwarning
+        return self
+
+    def __exit__(self, type_, value, trace):
+        if self._router is not None:
+            sys.stdout = self._router.stream
+            self._catcher.__exit__(type_, value, trace)
+            self._catcher = None
+            self._orig_showwarning = None
+            self._router = None
+
+    def _showwarning(self, message, category, filename, lineno, file=None,
+                     line=None):
+        """
+        Records the warning for the current context. Warnings issued outside
+        of a capture go to the hook that was active before routing.
+        """
+        record = _WARNING_SLOT.get()
+        if record is None:
+            self._orig_showwarning(message, category, filename, lineno,
+                                   file, line)
+        else:
+            record.append(warnings.WarningMessage(message, category, filename,
+                                                  lineno, file, line))
+
+
+_WARNING_SLOT = _ContextSlot('xdoctest_warnings')
+
+
+def _routing_active():
+    return isinstance(sys.stdout, _RoutedStdout)
+
+
+class CaptureWarnings(object):
+    """
+    Records warnings like `warnings.catch_warnings(record=True)`, but only
+    those issued in the current thread or task while `RoutedOutput` is active.
+
+    Note:
+        While `RoutedOutput` is active every warning is recorded each time it
+        is issued (as with the ``'always'`` filter), even when a filter or an
+        earlier capture would have suppressed a repeat of it.
+
+    Example:
+        >>> from xdoctest.utils.util_stream import *
+        >>> with CaptureWarnings() as record:
+        >>>     warnings.warn('recorded')
+        >>> assert str(record[0].message) == 'recorded'
+        >>> def warn_once():
+        >>>     with CaptureWarnings() as record:
+        >>>         warnings.warn('repeated')
+        >>>     return record
+        >>> with RoutedOutput():
+        >>>     records = [warn_once(), warn_once()]
+        >>> assert [len(record) for record in records] == [1, 1]
+        >>> # Warnings outside of a capture go to the previous hook
+        >>> seen = []
+        >>> orig_showwarning = warnings.showwarning
+        >>> warnings.showwarning = lambda *args: seen.append(args[0])
+        >>> with RoutedOutput():
+        >>>     warnings.warn('not captured')
+        >>> warnings.showwarning = orig_showwarning
+        >>> assert str(seen[0]) == 'not captured'
+    """
+    def __init__(self):
+        self.record = []
+        self._token = None
+        self._catcher = None
+
+    def __enter__(self):
+        if _routing_active():
+            self._token = _WARNING_SLOT.set(self.record)
+        else:
+            self._catcher = warnings.catch_warnings(record=True)
+            self.record = self._catcher.__enter__()
+        return self.record
+
+    def __exit__(self, type_, value, trace):
+        if self._catcher is not None:
+            self._catcher.__exit__(type_, value, trace)
+            self._catcher = None
+        else:
+            _WARNING_SLOT.reset(self._token)
+            self._token = None
 
 
 class TeeStringIO(io.StringIO):
@@ -43,6 +238,125 @@ class TeeStringIO(io.StringIO):
         super(TeeStringIO, self).flush()
 
 
+class CaptureBuffer(io.TextIOBase):
+    r"""
+    Text stream that stores writes as a list of chunks and hands them out one
+    part at a time.
+
+    Unlike `TeeStringIO`, text is never copied into a growing internal buffer
+    and read back out. Each call to `pop_part` joins only the chunks written
+    since the previous call and then releases them, so the captured text is
+    held in memory about once. Optionally the total amount of captured text
+    can be capped; anything written past the cap is dropped (but still
+    forwarded to the redirect) and replaced by a short note.
+
+    Args:
+        redirect (file): if specified, writes are also forwarded here
+        max_chars (int): maximum number of characters to keep over the
+            lifetime of the buffer, None for no limit
+
+    Example:
+        >>> from xdoctest.utils.util_stream import *
+        >>> buf = CaptureBuffer(max_chars=8)
+        >>> buf.write('abc')
+        3
+        >>> buf.writelines(['def\n'])
+        >>> buf.pop_part()
+        'abcdef\n'
+        >>> buf.write('ghi')
+        3
+        >>> buf.getvalue()
+        'g'
+        >>> buf.pop_part()
+        'g\n... 2 characters of output truncated ...\n'
+        >>> buf.pop_part()
+        ''
+    """
+    def __init__(self, redirect=None, max_chars=None):
+        super(CaptureBuffer, self).__init__()
+        self.redirect = redirect
+        self.max_chars = max_chars
+        self.size = 0
+        self._chunks = []
+        self._dropped = 0
+
+    def isatty(self):  # nocover
+        """
+        Returns true of the redirect is a terminal.
+
+        Notes:
+            Needed for IPython.embed to work properly when this class is used
+            to override stdout / stderr.
+        """
+        return (self.redirect is not None and
+                hasattr(self.redirect, 'isatty') and self.redirect.isatty())
+
+    def writable(self):
+        return True
+
+    @property
+    def encoding(self):
+        if self.redirect is not None:
+            return self.redirect.encoding
+        else:
+            return 'utf-8'
+
+    @property
+    def errors(self):
+        return getattr(self.redirect, 'errors', None) or 'strict'
+
+    def write(self, msg):
+        if self.closed:
+            raise ValueError('I/O operation on closed file.')
+        if self.redirect is not None:
+            self.redirect.write(msg)
+        if six.PY2:
+            from xdoctest.utils.util_str import ensure_unicode
+            msg = ensure_unicode(msg)
+        n_chars = len(msg)
+        if self.max_chars is not None:
+            room = self.max_chars - self.size
+            if len(msg) > room:
+                self._dropped += len(msg) - max(room, 0)
+                msg = msg[:max(room, 0)]
+        if msg:
+            self._chunks.append(msg)
+            self.size += len(msg)
+        return n_chars
+
+    def flush(self):  # nocover
+        if self.redirect is not None:
+            self.redirect.flush()
+
+    def getvalue(self):
+        """
+        Returns the text written since the last call to `pop_part`.
+        """
+        return ''.join(self._chunks)
+
+    def pop_part(self):
+        """
+        Returns the text written since the last call and releases it.
+        """
+        chunks = self._chunks
+        if len(chunks) == 1:
+            text = chunks[0]
+        else:
+            text = ''.join(chunks)
+        self._chunks = []
+        if self._dropped:
+            if text and not text.endswith('\n'):
+                text += '\n'
+            text += '... {} characters of output truncated ...\n'.format(
+                self._dropped)
+            self._dropped = 0
+        return text
+
+    def close(self):
+        self._chunks = []
+        super(CaptureBuffer, self).close()
+
+
 class CaptureStream(object):
     """
     Generic class for capturing streaming output from stdout or stderr
@@ -53,9 +367,15 @@ class CaptureStdout(CaptureStream):
     r"""
     Context manager that captures stdout and stores it in an internal stream
 
+    Output is stored in a `CaptureBuffer`. Each call to `log_part` (which
+    happens on exit) stores the text written since the previous call in
+    `self.text` and appends it to `self.parts`.
+
     Args:
         supress (bool): if True, stdout is not printed while captured
             (default = True)
+        max_chars (int): maximum number of characters to capture in total,
+            None for no limit. Output past the limit is dropped and noted.
 
     Example:
         >>> self = CaptureStdout(supress=True)
@@ -79,7 +399,7 @@ class CaptureStdout(CaptureStream):
         ...     print('dont capture')
         >>> assert self.text is None
     """
-    def __init__(self, supress=True, enabled=True):
+    def __init__(self, supress=True, enabled=True, max_chars=None):
         self.enabled = enabled
         self.supress = supress
         self.orig_stdout = sys.stdout
@@ -87,18 +407,17 @@ class CaptureStdout(CaptureStream):
             redirect = None
         else:
             redirect = self.orig_stdout
-        self.cap_stdout = TeeStringIO(redirect)
+        self.cap_stdout = CaptureBuffer(redirect, max_chars=max_chars)
         self.text = None
 
-        self._pos = 0  # keep track of how much has been logged
         self.parts = []
         self.started = False
+        self._router = None
+        self._token = None
 
     def log_part(self):
-        """ Log what has been captured so far """
-        self.cap_stdout.seek(self._pos)
-        text = self.cap_stdout.read()
-        self._pos = self.cap_stdout.tell()
+        """ Log what has been captured since the last logged part """
+        text = self.cap_stdout.pop_part()
         self.parts.append(text)
         self.text = text
 
@@ -106,12 +425,24 @@ class CaptureStdout(CaptureStream):
         if self.enabled:
             self.text = ''
             self.started = True
-            sys.stdout = self.cap_stdout
+            if _routing_active():
+                # Only capture the output of the current thread or task
+                self._router = sys.stdout
+                if not self.supress:
+                    self.cap_stdout.redirect = self._router.current()
+                self._token = self._router.push(self.cap_stdout)
+            else:
+                sys.stdout = self.cap_stdout
 
     def stop(self):
         if self.enabled:
             self.started = False
-            sys.stdout = self.orig_stdout
+            if self._router is not None:
+                self._router.pop(self._token)
+                self._router = None
+                self._token = None
+            else:
+                sys.stdout = self.orig_stdout
 
     def __enter__(self):
         self.start()